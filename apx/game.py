@@ -18,7 +18,7 @@ class Game(gobject.GObject):
 
         maxx, maxy = 600, 500
         self.start_poly = [(0, 0), (maxx, 0), (maxx, maxy), (0, maxy), (0, 0)]
-        self._total_area = game_utils.total_area([self.start_poly])
+        self._total_area = game_utils.poly_area(self.start_poly)
 
         self.level = 1
         self.level_stats = defaultdict(lambda: defaultdict(int))
@@ -26,7 +26,6 @@ class Game(gobject.GObject):
         self.speed = 1 #: current game speed
 
         self.paused = False #: paused by player
-        self.claiming = False #: currently trying to claim new teritory
         self.immortal = False #: you cheat!
         self._prev_claim_time = dt.datetime.now()
 
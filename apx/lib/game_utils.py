@@ -1,4 +1,119 @@
+import bisect
 import math
+import random
+
+from array import array
+from collections import defaultdict
+
+try:
+    import numpy as np
+except ImportError: # the occupancy raster is optional, rects do the job otherwise
+    np = None
+
+class Polygon(object):
+    """immutable polygon that keeps its vertices in a flat array and works
+    out the vertex index, the neighbours, the bounding box and the edges once
+    upon creation. the array is of ints when all the coordinates are whole
+    numbers and of floats otherwise, so the dots stay exactly as given.
+    Behaves like the closed list of dot tuples (the first dot repeated at the
+    end), so it can be passed anywhere a list polygon goes"""
+    __slots__ = ('coords', 'box', 'edges', '_index', '_prev', '_next')
+
+    def __init__(self, dots):
+        dots = [(x, y) for x, y in dots]
+        if len(dots) > 1 and dots[0] == dots[-1]:
+            dots = dots[:-1]
+
+        coords = [coord for dot in dots for coord in dot]
+        if all(coord == int(coord) for coord in coords):
+            dots = [(int(x), int(y)) for x, y in dots]
+            coords = array('i', [int(coord) for coord in coords])
+        else:
+            coords = array('d', coords)
+
+        init = lambda name, val: object.__setattr__(self, name, val)
+
+        #: vertices as x, y, x, y, ... without the closing dot
+        init('coords', coords)
+
+        index = {}
+        for i, dot in enumerate(dots):
+            index.setdefault(dot, i)
+        init('_index', index)
+
+        init('_prev', dict(zip(dots, dots[-1:] + dots[:-1])))
+        init('_next', dict(zip(dots, dots[1:] + dots[:1])))
+
+        #: ((min_x, min_y), (max_x, max_y)) of the polygon
+        init('box', box_range(dots) if dots else None)
+
+        #: list of (dot, next_dot) lines going round the polygon
+        init('edges', list(zip(dots, dots[1:] + dots[:1])))
+
+    def __setattr__(self, name, val):
+        raise AttributeError("Polygon is immutable")
+
+    def prev(self, dot):
+        return self._prev[self._check(dot)]
+
+    def next(self, dot):
+        return self._next[self._check(dot)]
+
+    def index(self, dot):
+        return self._index[self._check(dot)]
+
+    def _check(self, dot):
+        # same error as list.index would give
+        dot = tuple(dot)
+        if dot not in self._index:
+            raise ValueError("%s is not in polygon" % (dot,))
+        return dot
+
+    def __len__(self):
+        return len(self.coords) // 2 + 1 if self.coords else 0
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return list(self)[i]
+
+        vertices = len(self.coords) // 2
+        if i < 0:
+            i += vertices + 1
+        if not 0 <= i <= vertices or not vertices:
+            raise IndexError("polygon index out of range")
+        i = i % vertices
+        return self.coords[i * 2], self.coords[i * 2 + 1]
+
+    def __iter__(self):
+        coords = self.coords
+        for i in range(0, len(coords), 2):
+            yield coords[i], coords[i + 1]
+        if coords:
+            yield coords[0], coords[1]
+
+    def __contains__(self, dot):
+        return tuple(dot) in self._index
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __eq__(self, other):
+        if isinstance(other, Polygon):
+            return self.coords == other.coords
+        return isinstance(other, (list, tuple)) and list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(tuple(self.coords))
+
+    def __repr__(self):
+        return "<Polygon %s>" % list(self)
+
 
 def line_formula(dot_a, dot_b):
     # what we are actually looking for is the relationship between x and y
@@ -80,6 +195,41 @@ def intersection(line1, line2):
         return None
 
 
+def segments_intersect(segments1, segments2):
+    """checks every segment in the (N, 2, 2) array against every segment in
+    the (M, 2, 2) one and returns an (N, M) boolean mask of the ones that touch
+    or cross. needs numpy"""
+    segments1 = np.asarray(segments1, dtype=float).reshape(-1, 1, 2, 2)
+    segments2 = np.asarray(segments2, dtype=float).reshape(1, -1, 2, 2)
+    ax1, ay1, ax2, ay2 = [segments1[..., dot, axis] for dot in (0, 1) for axis in (0, 1)]
+    bx1, by1, bx2, by2 = [segments2[..., dot, axis] for dot in (0, 1) for axis in (0, 1)]
+
+    def side(x1, y1, x2, y2, x, y):
+        # which side of the line the dot is on, 0 if on the line
+        return np.sign((x2 - x1) * (y - y1) - (y2 - y1) * (x - x1))
+
+    # ends of each segment are not on the same side of the other one
+    crossing = (side(bx1, by1, bx2, by2, ax1, ay1) * side(bx1, by1, bx2, by2, ax2, ay2) <= 0) & \
+               (side(ax1, ay1, ax2, ay2, bx1, by1) * side(ax1, ay1, ax2, ay2, bx2, by2) <= 0)
+
+    # and the bounding boxes overlap, which sorts out the collinear ones
+    overlap = (np.maximum(ax1, ax2) >= np.minimum(bx1, bx2)) & (np.maximum(bx1, bx2) >= np.minimum(ax1, ax2)) & \
+              (np.maximum(ay1, ay2) >= np.minimum(by1, by2)) & (np.maximum(by1, by2) >= np.minimum(ay1, ay2))
+
+    return crossing & overlap
+
+
+def first_intersection(segments1, segments2):
+    """returns indices (i, j) of the first pair of segments that touch or
+    cross, going through segments1 and then segments2. None if there is no
+    such pair. needs numpy"""
+    hits = segments_intersect(segments1, segments2)
+    if not hits.any():
+        return None
+    i, j = divmod(int(hits.argmax()), hits.shape[1])
+    return i, j
+
+
 def chain(poly):
     """links from first to last, add first item as last if you want a full circle"""
     for dot, next_dot in zip(poly, poly[1:]):
@@ -100,7 +250,8 @@ def on_line(dot, poly):
        and returns the line
     """
     x, y = dot
-    for ((prev_x, prev_y), (next_x, next_y)) in zip(poly, poly[1:]):
+    lines = poly.edges if isinstance(poly, Polygon) else zip(poly, poly[1:])
+    for ((prev_x, prev_y), (next_x, next_y)) in lines:
         if x == prev_x == next_x and (prev_y <= y <= next_y or prev_y >= y >= next_y):
             return (prev_x, prev_y), (next_x, next_y)
 
@@ -110,6 +261,56 @@ def on_line(dot, poly):
     return None
 
 
+class EdgeIndex(object):
+    """horizontal and vertical edges of the polygon kept in buckets keyed by
+    their fixed coordinate and sorted by start, so that on_line lookups are
+    O(log n). Build once per polygon and rebuild when the polygon changes"""
+    __slots__ = ('poly', '_horizontal', '_vertical')
+
+    def __init__(self, poly):
+        self.poly = poly
+
+        horizontal, vertical = defaultdict(list), defaultdict(list)
+        for i, ((x1, y1), (x2, y2)) in enumerate(zip(poly, poly[1:])):
+            line = (x1, y1), (x2, y2)
+            if x1 == x2:
+                vertical[x1].append((min(y1, y2), max(y1, y2), i, line))
+            if y1 == y2:
+                horizontal[y1].append((min(x1, x2), max(x1, x2), i, line))
+
+        self._vertical = self._buckets(vertical)
+        self._horizontal = self._buckets(horizontal)
+
+    def _buckets(self, edges):
+        res = {}
+        for fixed, bucket in edges.items():
+            bucket.sort()
+            res[fixed] = [edge[0] for edge in bucket], bucket
+        return res
+
+    def on_line(self, dot):
+        """same as game_utils.on_line(dot, self.poly) - returns the first
+        line in polygon order that contains the dot"""
+        x, y = dot
+
+        found_idx, found = None, None
+        for buckets, fixed, pos in ((self._vertical, x, y), (self._horizontal, y, x)):
+            bucket = buckets.get(fixed)
+            if not bucket:
+                continue
+
+            starts, edges = bucket
+            idx = bisect.bisect_right(starts, pos)
+
+            # edges of a simple polygon within one bucket touch only at the
+            # ends, so the dot can be on at most two of them - the one that
+            # starts closest before and the one before that
+            for start, end, i, line in edges[max(idx - 2, 0):idx]:
+                if pos <= end and (found_idx is None or i < found_idx):
+                    found_idx, found = i, line
+
+        return found
+
 
 def cleanup_poly(poly):
     """drop dupe points and remove points that are on the same line"""
@@ -129,17 +330,19 @@ def cleanup_poly(poly):
             res.append(dot)
         prev_dot = dot
 
-    prevs, nexts = lines(res)
-    for dot in list(res):
-        line = prevs[dot], nexts[dot]
-        if on_line(dot, line):
-            res.remove(dot)
+    # neighbours are taken before dropping anything, so a straight run of
+    # dots loses all of its middle ones in one go
+    res = [dot for prev, dot, next in zip(res[-1:] + res[:-1], res, res[1:] + res[:1])
+           if not on_line(dot, (prev, next))]
 
     return res + [res[0]]
 
 
 
 def prev_dot(dot, poly):
+    if isinstance(poly, Polygon):
+        return poly.prev(dot)
+
     if poly[0] == poly[-1]:
         poly = poly[:-1]
 
@@ -149,6 +352,9 @@ def prev_dot(dot, poly):
     return poly[idx]
 
 def next_dot(dot, poly):
+    if isinstance(poly, Polygon):
+        return poly.next(dot)
+
     if poly[0] == poly[-1]:
         poly = poly[:-1]
 
@@ -163,6 +369,9 @@ def _bounding_box(dot1, dot2):
     return [(x1, y1), (x2, y1), (x2, y2), (x1, y2)]
 
 def box_range(dots):
+    if isinstance(dots, Polygon):
+        return dots.box
+
     x1, x2 = min((dot[0] for dot in dots)), max((dot[0] for dot in dots))
     y1, y2 = min((dot[1] for dot in dots)), max((dot[1] for dot in dots))
     return (x1, y1), (x2, y2)
@@ -188,6 +397,146 @@ def in_area(dot, rects, on_line=False):
 
     return False
 
+def in_poly(dot, poly, on_line=False):
+    """checks if the dot is inside the rectilinear polygon by counting the
+    vertical edges on the right of it. borders count only if on_line is set"""
+    x, y = dot
+    inside = False
+    for (x1, y1), (x2, y2) in zip(poly, poly[1:] + poly[:1]):
+        if (x == x1 == x2 and min(y1, y2) <= y <= max(y1, y2)) or \
+           (y == y1 == y2 and min(x1, x2) <= x <= max(x1, x2)):
+            return on_line
+
+        if x1 == x2 and x1 > x and min(y1, y2) <= y < max(y1, y2):
+            inside = not inside
+    return inside
+
+
+def poly_area(poly):
+    """area of the polygon using the shoelace formula. works directly on the
+    vertices and stays in integers while the dots are on the pixel grid,
+    floats like 300.0 included"""
+    res = 0
+    for (x1, y1), (x2, y2) in zip(poly, poly[1:] + poly[:1]):
+        res += x1 * y2 - x2 * y1
+
+    res = abs(res)
+    if res != int(res):
+        return res / 2.0 # dots off the grid
+
+    res = int(res)
+    return res // 2 if res % 2 == 0 else res / 2.0
+
+
+class OccupancyRaster(object):
+    """claimed cells of the board kept in a numpy grid, one cell per pixel.
+    answers the same questions as in_area over the game rects, but with an
+    array lookup. needs numpy"""
+    def __init__(self, bounds):
+        (x1, y1), (x2, y2) = [(int(x), int(y)) for x, y in box_range(bounds)]
+        self.x, self.y = x1, y1
+
+        #: 1 for claimed cells, 0 for free ones
+        self.claimed = np.zeros((y2 - y1, x2 - x1), dtype=np.uint8)
+
+        self._dots_touching = None # dots that touch at least one free cell
+        self._dots_inside = None # dots that are surrounded by free cells
+        self._update()
+
+    def claim(self, poly, poly_rects = None):
+        """mark the area of the polygon as claimed. pass the decomposition
+        of the polygon in poly_rects when it is at hand"""
+        for rect in (poly_rects or decompose(poly)):
+            (x1, y1), (x2, y2) = [(int(x), int(y)) for x, y in box_range(rect)]
+            self.claimed[y1 - self.y:y2 - self.y, x1 - self.x:x2 - self.x] = 1
+        self._update()
+
+    def _update(self):
+        # dot (x, y) is the top-left corner of cell (x, y) and touches the
+        # four cells around it
+        free = self.claimed == 0
+        h, w = free.shape
+        touching = np.zeros((h + 1, w + 1), dtype=bool)
+        inside = np.zeros((h + 1, w + 1), dtype=bool)
+        inside[1:-1, 1:-1] = True
+        for rows, cols in ((slice(None, -1), slice(None, -1)), (slice(None, -1), slice(1, None)),
+                           (slice(1, None), slice(None, -1)), (slice(1, None), slice(1, None))):
+            touching[rows, cols] |= free
+            inside[rows, cols] &= free
+
+        self._dots_touching, self._dots_inside = touching, inside
+
+    def in_area(self, dot, on_line=False):
+        """same as game_utils.in_area over the rects of the free area"""
+        x, y = int(dot[0]) - self.x, int(dot[1]) - self.y
+        dots = self._dots_touching if on_line else self._dots_inside
+        h, w = dots.shape
+        return 0 <= x < w and 0 <= y < h and bool(dots[y, x])
+
+    def claimed_percent(self):
+        return np.count_nonzero(self.claimed) * 100.0 / self.claimed.size
+
+
+class RectIndex(object):
+    """bounding volume hierarchy over a static list of rects for quick
+    in_area checks. build it anew whenever the rects change"""
+    __slots__ = ('_root',)
+
+    leaf_size = 4
+
+    def __init__(self, rects):
+        boxes = []
+        for rect in rects:
+            (x1, y1), (x2, y2) = box_range(rect)
+            boxes.append((x1, y1, x2, y2))
+        self._root = self._build(boxes) if boxes else None
+
+    def _build(self, boxes):
+        # nodes are (x1, y1, x2, y2, children, boxes) tuples: the bounding box
+        # of everything below, then a pair of child nodes and None for inner
+        # nodes, or None and a list of (x1, y1, x2, y2) rect boxes for leaves
+        x1 = min((box[0] for box in boxes))
+        y1 = min((box[1] for box in boxes))
+        x2 = max((box[2] for box in boxes))
+        y2 = max((box[3] for box in boxes))
+
+        if len(boxes) <= self.leaf_size:
+            return x1, y1, x2, y2, None, boxes
+
+        # split in half along the longer side
+        if x2 - x1 >= y2 - y1:
+            boxes = sorted(boxes, key=lambda box: box[0] + box[2])
+        else:
+            boxes = sorted(boxes, key=lambda box: box[1] + box[3])
+
+        half = len(boxes) // 2
+        return x1, y1, x2, y2, (self._build(boxes[:half]), self._build(boxes[half:])), None
+
+    def in_area(self, dot, on_line=False):
+        """same as game_utils.in_area(dot, rects, on_line)"""
+        x, y = int(dot[0]), int(dot[1])
+
+        nodes = [self._root] if self._root else []
+        while nodes:
+            x1, y1, x2, y2, children, boxes = nodes.pop()
+            if not (x1 <= x <= x2 and y1 <= y <= y2):
+                continue
+
+            if children:
+                nodes.extend(children)
+                continue
+
+            for x1, y1, x2, y2 in boxes:
+                if on_line:
+                    if x1 <= x <= x2 and y1 <= y <= y2:
+                        return True
+                else:
+                    if x1 < x < x2 and y1 < y < y2:
+                        return True
+
+        return False
+
+
 def distance(dot1, dot2):
     (x1, y1), (x2, y2) = dot1, dot2
     return math.sqrt((x1 - x2) ** 2 + (y1-y2) ** 2)
@@ -298,6 +647,156 @@ def triangulate(poly):
         return [box + [box[0]]] + (triangulate(big) or [])
 
 
+def decompose(poly):
+    """split the rectilinear polygon into non-overlapping rectangles in
+    O(n log n) by sweeping top to bottom. returns the same list of closed
+    rectangles as triangulate does.
+
+    the sweep keeps the covered x-ranges of the current row as a sorted list
+    of boundaries. going over the horizontal edges of the next row toggles
+    their ends in that list - whatever the edge covered is now free and the
+    other way round. rectangles are closed only for the ranges the edges
+    touched, the rest keep going down"""
+    rows = defaultdict(list)
+    for (x1, y1), (x2, y2) in zip(poly, poly[1:] + poly[:1]):
+        if y1 == y2 and x1 != x2:
+            rows[y1].append((x1, x2))
+
+    bounds = [] # covered x ranges of the current row, [start, end, start, end, ...]
+    open_rects = {} # (x1, x2) -> y where the rect started
+    res = []
+
+    def touching(x):
+        """covered range that contains x, ends included"""
+        idx = bisect.bisect_right(bounds, x)
+        if idx % 2 == 1:
+            return bounds[idx - 1], bounds[idx]
+        elif idx and bounds[idx - 1] == x:
+            return bounds[idx - 2], bounds[idx - 1]
+
+    for y in sorted(rows):
+        toggles = set()
+        for x1, x2 in rows[y]:
+            toggles ^= set([x1, x2])
+
+        closing = set((touching(x) for x in toggles))
+        for x in toggles:
+            idx = bisect.bisect_left(bounds, x)
+            if idx < len(bounds) and bounds[idx] == x:
+                del bounds[idx]
+            else:
+                bounds.insert(idx, x)
+        opening = set((touching(x) for x in toggles))
+
+        for span in closing - opening:
+            if span:
+                (x1, x2), y1 = span, open_rects.pop(span)
+                res.append([(x1, y1), (x2, y1), (x2, y), (x1, y), (x1, y1)])
+
+        for span in opening - closing:
+            if span:
+                open_rects[span] = y
+
+    return res
+
+
+def cut_rects(rects, poly, poly_rects = None):
+    """cuts the polygon out of the rects and returns the ones that are left.
+    only the rects the polygon covers get split up, and the pieces are then
+    joined with each other and with the rects around them they share a whole
+    edge with, so that the list does not keep growing from claim to claim.
+    the rest of the rects are passed on as they are. pass the decomposition
+    of the polygon in poly_rects when it is at hand"""
+    holes = [box_range(rect) for rect in (poly_rects or decompose(poly))]
+    (px1, py1), (px2, py2) = box_range(poly)
+
+    res, local, originals = [], [], {}
+    for rect in rects:
+        (x1, y1), (x2, y2) = box_range(rect)
+        if x2 < px1 or px2 < x1 or y2 < py1 or py2 < y1:
+            res.append(rect) # out of the way
+            continue
+
+        box = (x1, y1, x2, y2)
+        originals[box] = rect
+        if x2 == px1 or px2 == x1 or y2 == py1 or py2 == y1:
+            local.append(box) # a neighbour the pieces might join
+            continue
+
+        pieces = [box]
+        for hole in holes:
+            pieces = [piece for box in pieces for piece in _subtract_box(box, hole)]
+        local.extend(pieces)
+
+    for x1, y1, x2, y2 in _merge_boxes(local):
+        rect = originals.get((x1, y1, x2, y2))
+        res.append(rect or [(x1, y1), (x2, y1), (x2, y2), (x1, y2), (x1, y1)])
+    return res
+
+def _merge_boxes(boxes):
+    """joins the (x1, y1, x2, y2) boxes that share a whole edge until no two
+    of them do. the boxes are looked up by their edges, so a join costs the
+    same however many boxes there are"""
+    boxes = set(boxes)
+    tops, bottoms, lefts, rights = {}, {}, {}, {}
+
+    def index(box, add):
+        x1, y1, x2, y2 = box
+        for edges, key in ((tops, (x1, x2, y1)), (bottoms, (x1, x2, y2)),
+                           (lefts, (y1, y2, x1)), (rights, (y1, y2, x2))):
+            if add:
+                edges[key] = box
+            else:
+                del edges[key]
+
+    for box in boxes:
+        index(box, True)
+
+    queue = list(boxes)
+    while queue:
+        box = queue.pop()
+        if box not in boxes:
+            continue # joined to another one already
+
+        x1, y1, x2, y2 = box
+        other = tops.get((x1, x2, y2)) or bottoms.get((x1, x2, y1)) or \
+                lefts.get((y1, y2, x2)) or rights.get((y1, y2, x1))
+        if not other:
+            continue
+
+        for joined in (box, other):
+            boxes.remove(joined)
+            index(joined, False)
+
+        box = (min(x1, other[0]), min(y1, other[1]), max(x2, other[2]), max(y2, other[3]))
+        boxes.add(box)
+        index(box, True)
+        queue.append(box)
+
+    return sorted(boxes)
+
+def _subtract_box(box, hole):
+    """splits what's left of the box after taking out the hole into full
+    width bands above and below and the bits on the sides"""
+    x1, y1, x2, y2 = box
+    (hx1, hy1), (hx2, hy2) = hole
+    if x2 <= hx1 or hx2 <= x1 or y2 <= hy1 or hy2 <= y1:
+        return [box]
+
+    res = []
+    if y1 < hy1:
+        res.append((x1, y1, x2, hy1))
+    if hy2 < y2:
+        res.append((x1, hy2, x2, y2))
+
+    top, bottom = max(y1, hy1), min(y2, hy2)
+    if x1 < hx1:
+        res.append((x1, top, hx1, bottom))
+    if hx2 < x2:
+        res.append((hx2, top, x2, bottom))
+    return res
+
+
 def _start_with(dot, poly):
     # wrap the poly around so it starts with the specified dot
     idx = poly.index(dot)
@@ -306,19 +805,24 @@ def _start_with(dot, poly):
 
 
 def cut_poly(big, poly):
-    """cuts the poly out of big and returns the result
-       the code is rather brute force and hard to chew. good luck
-    """
+    """cuts the poly out of big and returns the result - first the side that
+    goes round the rest of big and then the one that the path closes off.
+    works with vertex indices, so it takes O(n + k) for n dots in big and k
+    dots in the path"""
+    if not isinstance(big, Polygon):
+        big = Polygon(big)
+    dots, count = big[:-1], len(big) - 1
+
     # find where we start on the line
     connect_start = on_line(poly[0], big)
     connect_end = on_line(poly[-1], big)
 
-
     start_idx, end_idx = big.index(connect_start[0]), big.index(connect_end[0])
 
     # make sure we always go clockwise
     if end_idx < start_idx:
         poly = list(reversed(poly))
+        connect_start, connect_end = connect_end, connect_start
 
     elif end_idx == start_idx:
         # if it's the same line then match the direction of the parent
@@ -329,21 +833,49 @@ def cut_poly(big, poly):
             poly = list(reversed(poly))
 
 
-    end_dot = on_line(poly[0], big)[0]
-    start_dot = on_line(poly[-1], big)[1]
+    end = big.index(connect_start[0])
+    start = big.index(connect_end[1])
 
-    if start_dot == end_dot:
+    if start == end:
         # we ate a corner and now are all confused
-        start_dot = next_dot(start_dot, big)
-        end_dot = prev_dot(end_dot, big)
+        start, end = (start + 1) % count, (end - 1) % count
         poly = list(reversed(poly))
 
 
-    side_a = _start_with(start_dot, big)
-    side_a = poly + side_a[:side_a.index(end_dot) + 1]
+    # side a follows the path and then goes round big from start to end,
+    # side b takes the rest of big and goes back along the path
+    side_a_count = (end - start) % count + 1
+    side_a = list(poly) + [dots[(start + i) % count] for i in range(side_a_count)]
 
-    inside_dots = set(big) - set(side_a)
-    side_b = [dot for dot in _start_with(prev_dot(end_dot, big), big) if dot in inside_dots]
-    side_b = side_b + list(reversed(poly))
+    path_dots = set(poly)
+    side_b = [dots[(end + 1 + i) % count] for i in range(count - side_a_count)]
+    side_b = [dot for dot in side_b if dot not in path_dots] + list(reversed(poly))
 
     return cleanup_poly(side_a), cleanup_poly(side_b)
+
+
+def staircase(vertices, seed=0):
+    """rectilinear polygon with random column heights that has about the
+    given number of vertices. handy for benchmarks and tests"""
+    rnd = random.Random(seed)
+    columns = max((vertices - 2) // 2, 1)
+    poly, top = [(0, 1000)], None
+    for i in range(columns):
+        top = rnd.choice([y for y in range(0, 1000, 10) if y != top])
+        poly += [(i * 10, top), ((i + 1) * 10, top)]
+    poly.append((columns * 10, 1000))
+    return cleanup_poly(poly)
+
+
+if __name__ == "__main__":
+    import datetime as dt
+
+    print("vertices  triangulate  decompose")
+    for vertices in (10, 50, 100, 500, 1000, 2000):
+        poly = staircase(vertices)
+        timings = []
+        for func in (triangulate, decompose):
+            t = dt.datetime.now()
+            func(poly)
+            timings.append(dt.datetime.now() - t)
+        print("%8d  %11s  %9s" % (len(poly) - 1, timings[0], timings[1]))
@@ -6,8 +6,11 @@
 # See http://github.com/tbaugis/hamster_experiments/blob/master/README.textile
 
 from collections import defaultdict
+import contextlib
+import functools
 import math
 import datetime as dt
+import time
 
 import gi
 import collections
@@ -33,9 +36,16 @@ except: # we can also live without tweener. Scene.animate will not work
 import colorsys
 from collections import deque
 
-# lemme know if you know a better way how to get default font
-_test_label = gtk.Label("Hello")
-_font_desc = _test_label.get_style().font_desc.to_string()
+_font_desc = None
+def _default_font():
+    """font description string of the default font. asks gtk settings on
+    first use instead of creating a widget on import, so that we can draw
+    without a display, falling back to pango's default in that case"""
+    global _font_desc
+    if _font_desc is None:
+        settings = gtk.Settings.get_default()
+        _font_desc = settings.props.gtk_font_name if settings else "Sans 10"
+    return _font_desc
 
 
 class ColorUtils(object):
@@ -61,21 +71,13 @@ class ColorUtils(object):
 
     def parse(self, color):
         """parse string or a color tuple into color usable for cairo (all values
-        in the normalized (0..1) range"""
+        in the normalized (0..1) range. The color tweens hand out normalized
+        pytweener.RGB tuples that pass through as they are"""
         assert color is not None
 
         #parse color into rgb values
         if isinstance(color, str):
-            match = self.hex_color_long.match(color)
-            if match:
-                color = [int(color, 16) / 65535.0 for color in match.groups()]
-            else:
-                match = self.hex_color_normal.match(color)
-                if match:
-                    color = [int(color, 16) / 255.0 for color in match.groups()]
-                else:
-                    match = self.hex_color_short.match(color)
-                    color = [int(color + color, 16) / 255.0 for color in match.groups()]
+            color = self._parse_hex(color)
 
         elif isinstance(color, gdk.Color):
             color = [color.red / 65535.0,
@@ -92,18 +94,35 @@ class ColorUtils(object):
 
         return color
 
+    @staticmethod
+    @functools.lru_cache(maxsize = 256)
+    def _parse_hex(color):
+        """the hex strings are few and get parsed over and over on every
+        set_color, so the last ones are kept. returns a tuple, as the result
+        is shared"""
+        match = ColorUtils.hex_color_long.match(color)
+        if match:
+            return tuple(int(color, 16) / 65535.0 for color in match.groups())
+
+        match = ColorUtils.hex_color_normal.match(color)
+        if match:
+            return tuple(int(color, 16) / 255.0 for color in match.groups())
+
+        match = ColorUtils.hex_color_short.match(color)
+        return tuple(int(color + color, 16) / 255.0 for color in match.groups())
+
     def rgb(self, color):
-        """returns rgb[a] tuple of the color with values in range 0.255"""
-        return [c * 255 for c in self.parse(color)]
+        """returns rgb tuple of the color with values in range 0.255"""
+        return [c * 255 for c in self.parse(color)[:3]]
 
     def gdk(self, color):
         """returns gdk.Color object of the given color"""
-        c = self.parse(color)
-        return gdk.Color.from_floats(c)
+        c = self.parse(color)[:3]
+        return gdk.Color.from_floats(*c)
 
     def hex(self, color):
         c = self.parse(color)
-        return "#" + "".join(["%02x" % int(color * 255) for color in c])
+        return "#" + "".join(["%02x" % int(color * 255) for color in c[:3]])
 
     def is_light(self, color):
         """tells you if color is dark or light, so you can up or down the
@@ -132,6 +151,56 @@ def get_gdk_rectangle(x, y, w, h):
     return rect
 
 
+# boxes of the damage tracking are (x1, y1, x2, y2) tuples in whole device pixels
+def _device_box(context, x1, y1, x2, y2):
+    """box of the given user space extents on the device, padded by a pixel
+    for antialiasing. None for empty extents"""
+    if x2 <= x1 or y2 <= y1:
+        return None
+
+    xs, ys = [], []
+    for x, y in ((x1, y1), (x2, y1), (x2, y2), (x1, y2)):
+        x, y = context.user_to_device(x, y)
+        xs.append(x)
+        ys.append(y)
+    return (int(math.floor(min(xs))) - 1, int(math.floor(min(ys))) - 1,
+            int(math.ceil(max(xs))) + 1, int(math.ceil(max(ys))) + 1)
+
+def _union_box(box1, box2):
+    if not box1 or not box2:
+        return box1 or box2
+    return (min(box1[0], box2[0]), min(box1[1], box2[1]),
+            max(box1[2], box2[2]), max(box1[3], box2[3]))
+
+def _boxes_touch(box1, box2):
+    return box1[0] < box2[2] and box2[0] < box1[2] and \
+           box1[1] < box2[3] and box2[1] < box1[3]
+
+def _merge_boxes(boxes):
+    """union the overlapping boxes until none of them overlap"""
+    merged = []
+    for box in boxes:
+        i = 0
+        while i < len(merged):
+            if _boxes_touch(box, merged[i]):
+                box = _union_box(box, merged.pop(i))
+                i = 0
+            else:
+                i += 1
+        merged.append(box)
+    return merged
+
+_measure_target = None
+def _measure_context(matrix):
+    """context that draws nowhere, for measuring what the instructions would paint"""
+    global _measure_target
+    if _measure_target is None:
+        _measure_target = cairo.RecordingSurface(cairo.CONTENT_COLOR_ALPHA, None)
+    context = cairo.Context(_measure_target)
+    context.set_matrix(matrix)
+    return context
+
+
 
 
 def chain(*steps):
@@ -144,22 +213,122 @@ def chain(*steps):
             object, {params}
     Assumes that all callees accept on_complete named param.
     The last item in the list can omit that.
-    XXX - figure out where to place these guys as they are quite useful
+    For anything longer than a couple of steps a :class:`Sequence` reads better.
     """
-    if not steps:
-        return
+    steps = collections.deque(zip(steps[::2], steps[1::2]))
 
-    def on_done(sprite=None):
-        chain(*steps[2:])
+    def next_step(sprite=None):
+        obj, params = steps.popleft()
+        if steps:
+            params['on_complete'] = next_step
 
-    obj, params = steps[:2]
+        if callable(obj):
+            obj(**params)
+        else:
+            obj.animate(**params)
+
+    if steps:
+        next_step()
+
+
+class Sequence(object):
+    """Animation sequence written as a generator that yields what it waits
+    for next: a tween (as returned by animate), a number of seconds, another
+    sequence or a list of these to wait for all of them. None goes on right
+    away. The sequence moves on from the tween callbacks of the scene's
+    frame loop, a step at a time, and can be cancelled as a whole.
+    Use :func:`Scene.sequence` or :func:`Sprite.sequence` to start one.
+
+    Example::
+
+        def blink(sprite):
+            for i in range(3):
+                yield sprite.animate(opacity=0, duration=0.2)
+                yield sprite.animate(opacity=1, duration=0.2)
+            yield 0.5
+            sprite.visible = False
+
+        scene.sequence(blink(sprite))
+
+    A tween that gets killed before completing - by stop_animation or by
+    another tween taking over its attributes - leaves the sequence waiting
+    until it is cancelled.
+    """
+    def __init__(self, scene, steps, on_complete = None):
+        #: the scene the delays are counted on. Without one the delays and
+        #: animations pass right away
+        self.scene = scene
+
+        #: the generator
+        self.steps = steps
+
+        #: callback to execute once the generator has run out, gets the sequence
+        self.on_complete = on_complete
+
+        #: set once the generator has run out or the sequence was cancelled
+        self.complete = False
+
+        self._waiting = [] # tweens and sequences of the current step
+        self._resume()
+
+    def cancel(self):
+        """stop the sequence together with the animations of the current
+        step, without firing on_complete"""
+        if self.complete:
+            return
+        self.complete = True
+
+        waiting, self._waiting = self._waiting, []
+        for item in waiting:
+            if isinstance(item, Sequence):
+                item.cancel()
+            else:
+                self.scene.tweener.remove_tween(item)
+        self.steps.close()
+
+
+    def _resume(self):
+        while not self.complete:
+            try:
+                step = next(self.steps)
+            except StopIteration:
+                self.complete = True
+                if self.on_complete:
+                    self.on_complete(self)
+                return
+
+            if self._wait(step):
+                return
+
+    def _wait(self, step):
+        if not isinstance(step, (list, tuple)):
+            step = [step]
+
+        for item in step:
+            if isinstance(item, (int, float)):
+                if self.scene is None or item <= 0:
+                    continue
+                item = self.scene.after(self, item, lambda sequence: None)
+
+            if item is None or item.complete:
+                continue
+
+            on_complete = item.on_complete
+            def done(target, item = item, on_complete = on_complete):
+                if on_complete:
+                    on_complete(target)
+                self._step_done(item)
+            item.on_complete = done
+            self._waiting.append(item)
+
+        return bool(self._waiting)
+
+    def _step_done(self, item):
+        if item in self._waiting:
+            self._waiting.remove(item)
+            if not self._waiting:
+                self._resume()
 
-    if len(steps) > 2:
-        params['on_complete'] = on_done
-    if isinstance(obj, collections.Callable):
-        obj(**params)
-    else:
-        obj.animate(**params)
 
 def full_pixels(space, data, gap_pixels=1):
     """returns the given data distributed in the space ensuring it's full pixels
@@ -327,8 +496,6 @@ class Graphics(object):
         fill.
         """
         color = Colors.parse(color) # parse whatever we have there into a normalized triplet
-        if len(color) == 4 and alpha is None:
-            alpha = color[3]
         r, g, b = color[:3]
         self._add_instruction("set_color", r, g, b, alpha)
 
@@ -448,7 +615,7 @@ class Graphics(object):
             raise "Can not create layout without existing context!"
 
         layout = pangocairo.create_layout(self.context)
-        font_desc = pango.FontDescription(_font_desc)
+        font_desc = pango.FontDescription(_default_font())
         if size: font_desc.set_absolute_size(size * pango.SCALE)
 
         layout.set_font_description(font_desc)
@@ -456,7 +623,7 @@ class Graphics(object):
 
     def show_label(self, text, size = None, color = None, font_desc = None):
         """display text. unless font_desc is provided, will use system's default font"""
-        font_desc = pango.FontDescription(font_desc or _font_desc)
+        font_desc = pango.FontDescription(font_desc or _default_font())
         if color: self.set_color(color)
         if size: font_desc.set_absolute_size(size * pango.SCALE)
         self.show_layout(text, font_desc)
@@ -468,8 +635,12 @@ class Graphics(object):
         """this function is most likely to change"""
         self._add_instruction("text_path", text)
 
-    def _show_layout(self, context, layout, text, font_desc, alignment, width, wrap,
-                     ellipsize, single_paragraph_mode):
+    def _show_layout(self, context, layout, *args):
+        self._setup_layout(layout, *args)
+        pangocairo.show_layout(context, layout)
+
+    def _setup_layout(self, layout, text, font_desc, alignment, width, wrap,
+                      ellipsize, single_paragraph_mode):
         layout.set_font_description(font_desc)
         layout.set_markup(text)
         layout.set_width(int(width or -1))
@@ -483,8 +654,6 @@ class Graphics(object):
             else:
                 layout.set_ellipsize(ellipsize or pango.EllipsizeMode.END)
 
-        pangocairo.show_layout(context, layout)
-
 
     def show_layout(self, text, font_desc, alignment = pango.Alignment.LEFT,
                     width = -1, wrap = None, ellipsize = None,
@@ -542,6 +711,39 @@ class Graphics(object):
                 getattr(context, instruction)(*args)
 
 
+    def _measure(self, context):
+        """box on the device of what the instructions would paint on the
+        given context. paints nothing and returns None if the instructions
+        don't either"""
+        box = None
+        for instruction, args in self.__new_instructions or self.__instruction_cache or []:
+            if instruction in ("stroke", "stroke_preserve"):
+                exts = context.stroke_extents()
+            elif instruction in ("fill", "fill_preserve"):
+                exts = context.fill_extents()
+            elif instruction in ("paint", "mask"):
+                exts = context.clip_extents()
+            elif instruction == "show_layout":
+                layout = args[0]
+                self._setup_layout(*args)
+                pangocairo.update_layout(context, layout)
+                ink, logical = layout.get_pixel_extents()
+                x, y = context.get_current_point()
+                exts = (x + ink.x, y + ink.y, x + ink.x + ink.width, y + ink.y + ink.height)
+            elif instruction == "show_text":
+                x, y = context.get_current_point()
+                x_bearing, y_bearing, width, height = context.text_extents(args[0])[:4]
+                exts = (x + x_bearing, y + y_bearing, x + x_bearing + width, y + y_bearing + height)
+            else:
+                if instruction != "set_color" and not instruction.startswith("set_source"):
+                    getattr(context, instruction)(*args)
+                continue
+
+            box = _union_box(box, _device_box(context, *exts))
+            if instruction in ("stroke", "fill"):
+                context.new_path()
+        return box
+
 
     def _draw_as_bitmap(self, context, opacity):
         """
@@ -726,6 +928,8 @@ class Parent(object):
 
         for sprite in sprites:
             if sprite in self.sprites:
+                if scene:
+                    scene._damage(sprite) # the area it leaves behind
                 self.sprites.remove(sprite)
                 sprite._scene = None
                 sprite.parent = None
@@ -797,6 +1001,144 @@ class Parent(object):
         return "<%s %s>" % (self.__class__.__name__, getattr(self, "id", None) or str(id(self)))
 
 
+class BaseScene(Parent):
+    """common root of :class:`Scene` and :class:`OffscreenScene` - the
+    point where walking up the sprite tree stops. Keeps track of the damaged
+    areas for the partial redraw"""
+    def _damage(self, sprite):
+        """queue redraw of the sprite. with partial redraw on, notes the areas
+        the sprite and its children have covered so far - the new ones are
+        measured when the frame is queued"""
+        if self._tracks_damage():
+            sprites = [sprite]
+            while sprites:
+                damaged = sprites.pop()
+                if damaged._drawn_box:
+                    self._damage_boxes.append(damaged._drawn_box)
+                damaged.__dict__['_drawn_box'] = damaged.__dict__['_tree_box'] = None
+                sprites.extend(damaged.sprites)
+
+            parent = sprite.parent
+            while isinstance(parent, Sprite):
+                parent.__dict__['_tree_box'] = None
+                parent = parent.parent
+
+            self._damaged.add(sprite)
+
+        self._request_frame()
+
+    def _tracks_damage(self):
+        return False
+
+    def _request_frame(self):
+        pass
+
+    def _measure_damage(self):
+        """boxes of what has changed since the previous frame - the areas
+        the damaged sprites covered before and the ones they cover now,
+        merged and clipped to the scene"""
+        damaged, boxes = list(self._damaged), list(self._damage_boxes)
+        self._damaged.clear()
+        del self._damage_boxes[:]
+
+        damaged_set = set(damaged)
+        for sprite in damaged:
+            parent_matrix = self._damage_parent_matrix(sprite, damaged_set)
+            if parent_matrix is not None:
+                sprite._measure_tree(parent_matrix, boxes)
+
+        if not self.width:
+            return boxes
+
+        width, height = int(math.ceil(self.width)), int(math.ceil(self.height))
+        boxes = [(max(x1, 0), max(y1, 0), min(x2, width), min(y2, height))
+                 for x1, y1, x2, y2 in _merge_boxes(boxes)]
+        return [box for box in boxes if box[0] < box[2] and box[1] < box[3]]
+
+    def _damage_parent_matrix(self, sprite, damaged):
+        """parent matrix of the damaged sprite. None when it is not on our
+        stage anymore, is hidden, or gets measured with a damaged parent"""
+        parent = sprite.parent
+        while isinstance(parent, Sprite):
+            if parent in damaged or parent.visible is False:
+                return None
+            parent = parent.parent
+
+        if parent is not self:
+            return None
+        return sprite.parent.get_matrix()
+
+
+# what setting a sprite attribute takes, see _setter_action
+_SET_CACHE, _SET_PARENT_MATRIX, _SET_TRANSFORM, _SET_RENDER, _SET_PARENT, \
+    _SET_VISIBLE, _SET_OPACITY, _SET_Z_ORDER, _SET_REDRAW = range(9)
+
+_setter_actions = defaultdict(dict) # sprite class -> {attribute name: action}
+
+def _setter_action(cls, name):
+    """figure out once per sprite class and attribute what setting it
+    involves - the property setter, or one of the _SET_ actions"""
+    attr = getattr(cls, name, None)
+    if isinstance(attr, property) and attr.fset is not None:
+        action = attr.fset
+    elif name == '_prev_parent_matrix':
+        action = _SET_PARENT_MATRIX
+    elif name in cls.cache_attrs or name in cls.graphics_unrelated_attrs:
+        action = _SET_CACHE
+    elif name in cls.transformation_attrs:
+        action = _SET_TRANSFORM
+    elif name == 'parent':
+        action = _SET_PARENT
+    elif name == 'visible':
+        action = _SET_VISIBLE
+    elif name == 'opacity':
+        action = _SET_OPACITY
+    elif name == 'z_order':
+        action = _SET_Z_ORDER
+    elif name in cls.visibility_attrs:
+        action = _SET_REDRAW
+    else:
+        # if attribute is not in transformation nor visibility, we conclude
+        # that it must be causing the sprite needs re-rendering
+        action = _SET_RENDER
+
+    _setter_actions[cls][name] = action
+    return action
+
+
+_identity_matrix = cairo.Matrix() # shared, never to be changed
+
+_batch = None # sprite -> set of the actions waiting for the end of the batch
+_batch_depth = 0
+
+@contextlib.contextmanager
+def batch():
+    """Hold off the invalidation and redraw that follows the sprite changes
+       till the end of the block, and then do it once per changed sprite.
+       Sprite's own matrix is reset right away, but the children see the
+       change only when the outermost batch is over.
+
+       Example::
+         with scene.batch():
+             for sprite in sprites:
+                 sprite.x, sprite.y = sprite.x + 1, sprite.y + 1
+    """
+    global _batch, _batch_depth
+    if _batch is None:
+        _batch = {}
+    _batch_depth += 1
+    try:
+        yield
+    finally:
+        _batch_depth -= 1
+        if _batch_depth == 0:
+            pending, _batch = _batch, None
+            for sprite, actions in pending.items():
+                for action in actions:
+                    sprite._changed(action)
+                sprite.redraw()
+
+
 class Sprite(Parent, gobject.GObject):
     """The Sprite class is a basic display list building block: a display list
        node that can display graphics and can also contain children.
@@ -852,6 +1194,16 @@ class Sprite(Parent, gobject.GObject):
         # a place where to store child handlers
         self.__dict__['_child_handlers'] = defaultdict(list)
 
+        # damage tracking: device box of what we painted last, and of what
+        # we painted together with our children. None when not known,
+        # empty tuple when nothing got painted
+        self.__dict__['_drawn_box'] = None
+        self.__dict__['_tree_box'] = None
+
+        # local matrix times the parent's, and the parent matrix it was made with
+        self.__dict__['_world_matrix'] = None
+        self.__dict__['_world_parent'] = None
+
         self._scene = None
 
         self.debug = debug
@@ -943,9 +1295,13 @@ class Sprite(Parent, gobject.GObject):
 
 
     def __setattr__(self, name, val):
-        if isinstance(getattr(type(self), name, None), property) and \
-           getattr(type(self), name).fset is not None:
-            getattr(type(self), name).fset(self, val)
+        try:
+            action = _setter_actions[self.__class__][name]
+        except KeyError:
+            action = _setter_action(self.__class__, name)
+
+        if action.__class__ is not int:
+            action(self, val) # property setter
             return
 
         prev = self.__dict__.get(name, "hamster_graphics_no_value_really")
@@ -953,50 +1309,75 @@ class Sprite(Parent, gobject.GObject):
             return
         self.__dict__[name] = val
 
-        # prev parent matrix walks downwards
-        if name == '_prev_parent_matrix' and self.visible:
-            # downwards recursive invalidation of parent matrix
-            for sprite in self.sprites:
-                sprite._prev_parent_matrix = None
-
+        if action == _SET_CACHE:
+            return
 
-        if name in self.cache_attrs or name in self.graphics_unrelated_attrs:
+        if action == _SET_PARENT_MATRIX:
+            # prev parent matrix walks downwards
+            if self.visible:
+                # downwards recursive invalidation of parent matrix
+                for sprite in self.sprites:
+                    sprite._prev_parent_matrix = None
             return
 
-        """all the other changes influence cache vars"""
+        if action == _SET_TRANSFORM:
+            self.__dict__['_matrix'] = self.__dict__['_world_matrix'] = None
+        elif action == _SET_RENDER:
+            self.__dict__["_sprite_dirty"] = True
+        elif action == _SET_PARENT:
+            # on parent change invalidate the matrix and the enclosing layers
+            self.__dict__["_sprite_dirty"] = True
+            self.__dict__.pop('_layer', None)
+            for sprite in self.all_child_sprites():
+                sprite.__dict__.pop('_layer', None)
+            self._prev_parent_matrix = None
+            return
 
-        if name == 'visible' and self.visible == False:
-            # when transforms happen while sprite is invisible
-            for sprite in self.sprites:
-                sprite._prev_parent_matrix = None
+        if _batch is not None:
+            # the rest waits for the end of the batch
+            pending = _batch.get(self)
+            if pending is None:
+                pending = _batch[self] = set()
+            pending.add(action)
+            return
 
+        self._changed(action)
+        self.redraw()
 
+    def _changed(self, action):
+        """the invalidation that goes beyond the sprite itself"""
         # on moves invalidate our matrix, child extent cache (as that depends on our transforms)
         # as well as our parent's child extents as we moved
         # then go into children and invalidate the parent matrix down the tree
-        if name in self.transformation_attrs:
-            self._matrix = None
+        if action == _SET_TRANSFORM:
             for sprite in self.sprites:
                 sprite._prev_parent_matrix = None
-        elif name not in self.visibility_attrs:
-            # if attribute is not in transformation nor visibility, we conclude
-            # that it must be causing the sprite needs re-rendering
-            self.__dict__["_sprite_dirty"] = True
 
-        # on parent change invalidate the matrix
-        if name == 'parent':
-            self._prev_parent_matrix = None
-            return
+        elif action == _SET_VISIBLE:
+            if self.visible == False:
+                # when transforms happen while sprite is invisible
+                for sprite in self.sprites:
+                    sprite._prev_parent_matrix = None
 
-        if name == 'opacity' and getattr(self, "cache_as_bitmap", None) and hasattr(self, "graphics"):
-            # invalidating cache for the bitmap version as that paints opacity in the image
-            self.graphics._last_matrix = None
+        elif action == _SET_OPACITY:
+            if getattr(self, "cache_as_bitmap", None) and hasattr(self, "graphics"):
+                # invalidating cache for the bitmap version as that paints opacity in the image
+                self.graphics._last_matrix = None
 
-        if name == 'z_order' and getattr(self, "parent", None):
-            self.parent._sort()
+        elif action == _SET_Z_ORDER:
+            if getattr(self, "parent", None):
+                self.parent._sort()
 
+    def set(self, **attrs):
+        """Set several attributes in one go. The matrices of the children get
+           invalidated and the redraw gets queued just once.
 
-        self.redraw()
+           Example::
+             sprite.set(x = 50, y = 100, rotation = 0.5)
+        """
+        with batch():
+            for name, val in attrs.items():
+                setattr(self, name, val)
 
 
     def _get_mouse_cursor(self):
@@ -1054,7 +1435,7 @@ class Sprite(Parent, gobject.GObject):
         """returns all the parent sprites up until scene"""
         res = []
         parent = self.parent
-        while parent and isinstance(parent, Scene) == False:
+        while parent and isinstance(parent, BaseScene) == False:
             res.insert(0, parent)
             parent = parent.parent
 
@@ -1154,9 +1535,29 @@ class Sprite(Parent, gobject.GObject):
            during scene redraw are ignored in order to avoid echoes.
            Call scene.redraw() explicitly if you need to redraw in these cases.
         """
+        layer = self._get_layer()
+        while layer:
+            layer._invalidate()
+            layer = layer._get_layer()
+
         scene = self.get_scene()
         if scene:
-            scene.redraw()
+            scene._damage(self)
+
+    def _get_layer(self):
+        """the closest :class:`Layer` the sprite is in, or None. looked up
+        once and kept till the sprite or one of its parents gets reparented"""
+        try:
+            return self.__dict__['_layer']
+        except KeyError:
+            pass
+
+        parent = getattr(self, "parent", None)
+        while isinstance(parent, Sprite) and not isinstance(parent, Layer):
+            parent = parent.parent
+        layer = parent if isinstance(parent, Layer) else None
+        self.__dict__['_layer'] = layer
+        return layer
 
     def animate(self, duration = None, easing = None, on_complete = None,
                 on_update = None, round = False, **kwargs):
@@ -1178,6 +1579,22 @@ class Sprite(Parent, gobject.GObject):
                 setattr(self, key, val)
             return None
 
+    def sequence(self, steps, on_complete = None):
+        """Run the generator as a :class:`Sequence` on the sprite's scene.
+        Outside of a scene the delays pass right away"""
+        return Sequence(self.get_scene(), steps, on_complete)
+
+    def after(self, delay, callback):
+        """Call callback(sprite) in delay seconds on the scene's clock. The
+        call is dropped by :func:`stop_animation`, just like the tweens.
+        Outside of a scene the callback is called right away"""
+        scene = self.get_scene()
+        if scene:
+            return scene.after(self, delay, callback)
+        else:
+            callback(self)
+            return None
+
     def stop_animation(self):
         """stop animation without firing on_complete"""
         scene = self.get_scene()
@@ -1185,6 +1602,10 @@ class Sprite(Parent, gobject.GObject):
             scene.stop_animation(self)
 
     def get_local_matrix(self):
+        return cairo.Matrix() * self._local_matrix()
+
+    def _local_matrix(self):
+        """the cached local matrix itself, not to be changed"""
         if self._matrix is None:
             matrix, x, y, pivot_x, pivot_y = cairo.Matrix(), self.x, self.y, self.pivot_x, self.pivot_y
 
@@ -1208,13 +1629,24 @@ class Sprite(Parent, gobject.GObject):
 
             self._matrix = matrix
 
-        return cairo.Matrix() * self._matrix
+        return self._matrix
+
+    def _world_matrix_for(self, parent_matrix):
+        """local matrix times the given parent matrix. the product is kept for
+        as long as we stay put and get the very same parent matrix object, so
+        that the children can tell the same way that nothing has changed"""
+        world = self.__dict__['_world_matrix']
+        if world is None or self.__dict__['_world_parent'] is not parent_matrix:
+            world = self._local_matrix() * parent_matrix
+            self.__dict__['_world_matrix'] = world
+            self.__dict__['_world_parent'] = parent_matrix
+        return world
 
 
     def get_matrix(self):
         """return sprite's current transformation matrix"""
         if self.parent:
-            return self.get_local_matrix() * (self._prev_parent_matrix or self.parent.get_matrix())
+            return self._local_matrix() * (self._prev_parent_matrix or self.parent.get_matrix())
         else:
             return self.get_local_matrix()
 
@@ -1230,22 +1662,58 @@ class Sprite(Parent, gobject.GObject):
         """Converts x, y from sprite's local coordinates to scene coordinates"""
         return self.get_matrix().transform_point(x, y)
 
+    def _measure(self, matrix):
+        """remember and return the device box of our own graphics when drawn
+        with the given full transformation matrix"""
+        if self._sprite_dirty:
+            self.emit("on-render")
+            self.__dict__["_sprite_dirty"] = False
+
+        box = self.graphics._measure(_measure_context(matrix))
+        self.__dict__['_drawn_box'] = box or ()
+        return box
+
+    def _measure_tree(self, parent_matrix, boxes):
+        """measure ourselves and our children, adding the boxes to the list"""
+        if self.visible is False:
+            return
+
+        matrix = self._local_matrix() * parent_matrix
+        box = self._measure(matrix)
+        if box:
+            boxes.append(box)
+
+        for sprite in self._z_ordered_sprites:
+            sprite._measure_tree(matrix, boxes)
+
     def _draw(self, context, opacity = 1, parent_matrix = None):
         if self.visible is False:
             return
 
+        # the part of the scene being redrawn when the scene tracks damage
+        scene = self._scene or self.get_scene()
+        clip = scene._clip_box if scene else None
+        if clip and self._tree_box is not None and \
+           not (self._tree_box and _boxes_touch(self._tree_box, clip)):
+            return # unchanged and out of the way
+
         if (self._sprite_dirty): # send signal to redo the drawing when sprite is dirty
             self.emit("on-render")
             self.__dict__["_sprite_dirty"] = False
 
 
         no_matrix = parent_matrix is None
-        parent_matrix = parent_matrix or cairo.Matrix()
+        parent_matrix = parent_matrix or _identity_matrix
 
         # cache parent matrix
-        self._prev_parent_matrix = parent_matrix
+        if self._prev_parent_matrix is not parent_matrix:
+            self._prev_parent_matrix = parent_matrix
 
-        matrix = self.get_local_matrix()
+        matrix = self._local_matrix()
+        world_matrix = self._world_matrix_for(parent_matrix)
+
+        if clip and self._drawn_box is None:
+            self._measure(world_matrix)
 
         context.save()
         context.transform(matrix)
@@ -1277,16 +1745,26 @@ class Sprite(Parent, gobject.GObject):
 
 
                 context.rectangle(exts.x, exts.y, exts.width, exts.height)
-                context.set_source_rgb(*Colors.parse(color))
+                context.set_source_rgb(*Colors.parse(color)[:3])
                 context.stroke()
                 context.restore()
 
         for sprite in self._z_ordered_sprites:
-            sprite._draw(context, self.opacity * opacity, matrix * parent_matrix)
+            sprite._draw(context, self.opacity * opacity, world_matrix)
 
 
         context.restore()
 
+        if clip:
+            tree_box = self._drawn_box
+            for sprite in self._z_ordered_sprites:
+                if sprite.visible and tree_box is not None:
+                    if sprite._tree_box is None:
+                        tree_box = None # not known until the child gets drawn
+                    else:
+                        tree_box = _union_box(tree_box, sprite._tree_box) or ()
+            self.__dict__['_tree_box'] = tree_box
+
         # having parent and not being given parent matrix means that somebody
         # is calling draw directly - avoid caching matrix for such a case
         # because when we will get called properly it won't be respecting
@@ -1314,6 +1792,126 @@ class Sprite(Parent, gobject.GObject):
         return False
 
 
+class Layer(Sprite):
+    """Sprite that renders its graphics and children on a surface of its own
+    and then just paints the surface as long as nothing inside changes.
+    Good for the parts of the scene that change rarely, but are expensive to
+    draw - moving the layer around does not need a re-render, changing any
+    of the child sprites does. Opacity applies to the layer as a whole.
+    """
+    def __init__(self, **kwargs):
+        Sprite.__init__(self, **kwargs)
+        self.__dict__['_layer_surface'] = None
+        self.__dict__['_layer_offset'] = (0, 0)
+        self.__dict__['_layer_scale'] = None
+        self.__dict__['_layer_dirty'] = True
+
+    def add_child(self, *sprites):
+        self._invalidate()
+        Sprite.add_child(self, *sprites)
+
+    def remove_child(self, *sprites):
+        self._invalidate()
+        Sprite.remove_child(self, *sprites)
+
+    def _invalidate(self):
+        """re-render the layer on the next draw"""
+        if self.__dict__.get('_layer_dirty', True):
+            return
+        self.__dict__['_layer_dirty'] = True
+
+        scene = self.get_scene()
+        if scene and scene._tracks_damage() and self._drawn_box:
+            # all of the layer gets repainted
+            scene._damage_boxes.append(self._drawn_box)
+
+    def _draw(self, context, opacity = 1, parent_matrix = None):
+        if self.visible is False:
+            return
+
+        scene = self._scene or self.get_scene()
+        clip = scene._clip_box if scene else None
+        if clip and self._tree_box is not None and \
+           not (self._tree_box and _boxes_touch(self._tree_box, clip)):
+            return
+
+        no_matrix = parent_matrix is None
+        parent_matrix = parent_matrix or _identity_matrix
+        if self._prev_parent_matrix is not parent_matrix:
+            self._prev_parent_matrix = parent_matrix
+
+        matrix = self._local_matrix()
+        full_matrix = self._world_matrix_for(parent_matrix)
+
+        # render at the resolution we are shown at so that zooming in stays crisp
+        scale = (math.hypot(full_matrix.xx, full_matrix.yx) or 1,
+                 math.hypot(full_matrix.xy, full_matrix.yy) or 1)
+
+        if self._layer_dirty or self._sprite_dirty or scale != self._layer_scale:
+            self._render(context, full_matrix, scale)
+
+        surface = self._layer_surface
+        if surface:
+            x, y = self._layer_offset
+            context.save()
+            context.transform(matrix)
+            context.scale(1.0 / scale[0], 1.0 / scale[1])
+            context.set_source_surface(surface, x, y)
+            context.paint_with_alpha(self.opacity * opacity)
+            context.restore()
+
+        if clip:
+            box = None
+            if surface:
+                measure = _measure_context(full_matrix)
+                measure.scale(1.0 / scale[0], 1.0 / scale[1])
+                box = _device_box(measure, x, y, x + surface.get_width(), y + surface.get_height())
+            self.__dict__['_drawn_box'] = self.__dict__['_tree_box'] = box or ()
+
+        if isinstance(self.parent, Sprite) and no_matrix:
+            self._prev_parent_matrix = None
+
+    def _render(self, context, full_matrix, scale):
+        """draw our graphics and the children onto the layer surface"""
+        if self._sprite_dirty:
+            self.emit("on-render")
+            self.__dict__["_sprite_dirty"] = False
+
+        recording = cairo.RecordingSurface(cairo.CONTENT_COLOR_ALPHA, None)
+        recording_context = cairo.Context(recording)
+        recording_context.scale(*scale)
+
+        # the scene's clip does not concern the layer, it goes all in
+        scene = self.get_scene()
+        clip = scene._clip_box if scene else None
+        if clip:
+            scene._clip_box = None
+
+        self.graphics._draw(recording_context, 1)
+        recording_context.new_path()
+        for sprite in self._z_ordered_sprites:
+            sprite._draw(recording_context, 1, full_matrix)
+
+        if clip:
+            scene._clip_box = clip
+
+        surface, offset = None, (0, 0)
+        x, y, width, height = recording.ink_extents()
+        if width > 0 and height > 0:
+            x1, y1 = int(math.floor(x)), int(math.floor(y))
+            x2, y2 = int(math.ceil(x + width)), int(math.ceil(y + height))
+            surface = context.get_target().create_similar(cairo.CONTENT_COLOR_ALPHA, x2 - x1, y2 - y1)
+            surface_context = cairo.Context(surface)
+            surface_context.set_source_surface(recording, -x1, -y1)
+            surface_context.paint()
+            offset = (x1, y1)
+
+        self.__dict__['_layer_surface'] = surface
+        self.__dict__['_layer_offset'] = offset
+        self.__dict__['_layer_scale'] = scale
+        self.__dict__['_layer_dirty'] = False
+
+
 class BitmapSprite(Sprite):
     """Caches given image data in a surface similar to targets, which ensures
        that drawing it will be quick and low on CPU.
@@ -1427,6 +2025,7 @@ class Label(Sprite):
     }
 
     cache_attrs = Sprite.cache_attrs | set(("_letter_sizes", "__surface", "_ascent", "_bounds_width", "_measures"))
+    graphics_unrelated_attrs = Sprite.graphics_unrelated_attrs | set(("__surface", "_bounds_width", "_measures"))
 
     def __init__(self, text = "", size = None, color = None,
                  alignment = pango.Alignment.LEFT, single_paragraph = False,
@@ -1445,7 +2044,7 @@ class Label(Sprite):
         self.size = size
 
         #: pango.FontDescription, defaults to system font
-        self.font_desc = pango.FontDescription(font_desc or _font_desc)
+        self.font_desc = pango.FontDescription(font_desc or _default_font())
 
         #: color of label either as hex string or an (r,g,b) tuple
         self.color = color
@@ -1488,8 +2087,6 @@ class Label(Sprite):
 
         self.connect("on-render", self.on_render)
 
-        self.graphics_unrelated_attrs = self.graphics_unrelated_attrs | set(("__surface", "_bounds_width", "_measures"))
-
     def __setattr__(self, name, val):
         if name == "font_desc":
             if isinstance(val, str):
@@ -1712,7 +2309,7 @@ class Circle(Sprite):
         self.graphics.fill_stroke(self.fill, self.stroke, line_width = self.line_width)
 
 
-class Scene(Parent, gtk.DrawingArea):
+class Scene(BaseScene, gtk.DrawingArea):
     """ Drawing area for displaying sprites.
         Add sprites to the Scene by calling :func:`add_child`.
         Scene is descendant of `gtk.DrawingArea <http://www.pygtk.org/docs/pygtk/class-gtkdrawingarea.html>`_
@@ -1747,7 +2344,7 @@ class Scene(Parent, gtk.DrawingArea):
 
     def __init__(self, interactive = True, framerate = 60,
                        background_color = None, scale = False, keep_aspect = True,
-                       style_class=None):
+                       style_class=None, use_frame_clock = False, partial_redraw = False):
         gtk.DrawingArea.__init__(self)
 
         self._style = self.get_style_context()
@@ -1769,6 +2366,23 @@ class Scene(Parent, gtk.DrawingArea):
         #: also influence the smoothness of tweeners.
         self.framerate = framerate
 
+        #: Drive the redraws from the GdkFrameClock of the widget instead of
+        #: a timeout. Frames are then paced by the display, `framerate` is
+        #: ignored, and a scene with nothing to animate does not wake up at all.
+        self.use_frame_clock = use_frame_clock
+
+        #: Redraw just the areas of the sprites that have changed, and skip
+        #: drawing the sprites that are out of them. Pays off when most of the
+        #: scene stays put between frames. Has no effect when :attr:`scale`
+        #: is on.
+        self.partial_redraw = partial_redraw
+
+        self._damaged = set() # sprites changed since the last frame
+        self._damage_boxes = [] # and the boxes they had covered before the change
+        self._clip_box = None # box being redrawn during do_draw
+        self.__full_redraw = False
+        self._frame_hooks = [] # callbacks that run at the start of each frame
+
         #: Scene width. Will be `None` until first expose (that is until first
         #: on-enter-frame signal below).
         self.width = None
@@ -1777,11 +2391,11 @@ class Scene(Parent, gtk.DrawingArea):
         #: on-enter-frame signal below).
         self.height = None
 
-        #: instance of :class:`pytweener.Tweener` that is used by
+        #: instance of :class:`pytweener.VectorTweener` that is used by
         #: :func:`animate` function, but can be also accessed directly for advanced control.
         self.tweener = False
         if pytweener:
-            self.tweener = pytweener.Tweener(0.4, pytweener.Easing.Cubic.ease_in_out)
+            self.tweener = pytweener.VectorTweener(0.4, pytweener.Easing.Cubic.ease_in_out)
 
         #: read only info about current framerate (frames per second)
         self.fps = None # inner frames per second counter
@@ -1916,9 +2530,26 @@ class Scene(Parent, gtk.DrawingArea):
                                        on_update=on_update,
                                        round=round,
                                        **kwargs)
-        self.redraw()
+        self._request_frame()
         return tween
 
+    def after(self, sprite, delay, callback):
+        """Call callback(sprite) in delay seconds, unless the animations of
+        the sprite are stopped before that. Returns the timer that can be
+        passed to tweener.remove_tween"""
+        if not self.tweener: # here we complain
+            raise Exception("pytweener was not found. Include it to enable animations")
+
+        timer = self.tweener.add_callback(sprite, delay, callback)
+        self._request_frame()
+        return timer
+
+    def sequence(self, steps, on_complete = None):
+        """Run the generator as a :class:`Sequence` on the scene's clock and
+        return it. on_complete(sequence) is called when the generator runs
+        out"""
+        return Sequence(self, steps, on_complete)
+
 
     def stop_animation(self, sprites):
         """stop animation without firing on_complete"""
@@ -1928,22 +2559,104 @@ class Scene(Parent, gtk.DrawingArea):
         for sprite in sprites:
             self.tweener.kill_tweens(sprite)
 
+    def batch(self):
+        """context manager that invalidates and redraws the sprites changed
+        within it just once, see :func:`batch`"""
+        return batch()
+
 
     def redraw(self):
         """Queue redraw. The redraw will be performed not more often than
-           the `framerate` allows"""
+           the `framerate` allows, or on the next frame of the frame clock
+           when `use_frame_clock` is set"""
+        self.__full_redraw = True
+        self._request_frame()
+
+    def _tracks_damage(self):
+        return self.partial_redraw and not self.scale
+
+    def _request_frame(self):
         if self.__drawing_queued == False: #if we are moving, then there is a timeout somewhere already
             self.__drawing_queued = True
-            self._last_frame_time = dt.datetime.now()
-            gobject.timeout_add(1000 / self.framerate, self.__redraw_loop)
+            self._last_frame_time = self._now()
+            if self.use_frame_clock:
+                self.add_tick_callback(self.__on_frame_clock_tick, None)
+            else:
+                gobject.timeout_add(1000 / self.framerate, self.__redraw_loop)
+
+    def add_frame_hook(self, callback):
+        """call callback(scene) at the start of every frame, before the
+        changes get queued for drawing - in the same frame. The scene keeps
+        ticking while there are hooks, returning False removes the hook"""
+        self._frame_hooks.append(callback)
+        self._request_frame()
+
+    def __run_frame_hooks(self):
+        for hook in list(self._frame_hooks):
+            if hook(self) is False:
+                self._frame_hooks.remove(hook)
 
     def __redraw_loop(self):
         """loop until there is nothing more to tween"""
-        self.queue_draw() # this will trigger do_expose_event when the current events have been flushed
+        self.__run_frame_hooks()
+        self._queue_damage() # this will trigger do_expose_event when the current events have been flushed
+
+        self.__drawing_queued = bool(self.tweener and self.tweener.has_tweens()) \
+                                or bool(self._damaged) or bool(self._frame_hooks)
+        return self.__drawing_queued
+
+    def __on_frame_clock_tick(self, widget, frame_clock, user_data):
+        """same as the redraw loop, but called by the frame clock once per
+        frame. returning False removes the callback until next redraw"""
+        self.__run_frame_hooks()
+        self._queue_damage()
 
-        self.__drawing_queued = self.tweener and self.tweener.has_tweens()
+        self.__drawing_queued = bool(self.tweener and self.tweener.has_tweens()) \
+                                or bool(self._damaged) or bool(self._frame_hooks)
         return self.__drawing_queued
 
+    def _queue_damage(self):
+        """queue redraw of what has changed since the previous frame. without
+        partial redraw that is the whole scene"""
+        if not self._tracks_damage():
+            self.queue_draw()
+            return
+
+        self._update_tweens() # the tweened sprites report their damage
+
+        boxes = self._measure_damage()
+        full_redraw, self.__full_redraw = self.__full_redraw, False
+        if full_redraw or not self.width:
+            self.queue_draw()
+            return
+
+        width, height = int(math.ceil(self.width)), int(math.ceil(self.height))
+        if sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in boxes) > width * height / 2:
+            self.queue_draw() # not worth splitting hairs
+            return
+
+        for x1, y1, x2, y2 in boxes:
+            self.queue_draw_area(x1, y1, x2 - x1, y2 - y1)
+
+    def _update_tweens(self):
+        now = self._now()
+        delta = now - (self._last_frame_time or now)
+        self._last_frame_time = now
+        if self.tweener:
+            with batch():
+                self.tweener.update(delta)
+
+        if delta > 0: # a second call within the same frame says nothing of the rate
+            self.fps = 1 / delta
+
+    def _now(self):
+        """monotonic time in seconds - the time of the current frame when
+        we are driven by the frame clock"""
+        frame_clock = self.use_frame_clock and self.get_frame_clock()
+        if frame_clock:
+            return frame_clock.get_frame_time() / 1000000.0
+        return time.monotonic()
+
 
     def do_draw(self, context):
         if self.scale:
@@ -1953,26 +2666,27 @@ class Scene(Parent, gtk.DrawingArea):
                 aspect_x = aspect_y = min(aspect_x, aspect_y)
             context.scale(aspect_x, aspect_y)
 
-        if self.fps is None:
+        if self._window is None:
             self._window = self.get_window()
             self.emit("on-first-frame", context)
 
         cursor, self.mouse_x, self.mouse_y, mods = self._window.get_pointer()
 
-
-        # update tweens
-        now = dt.datetime.now()
-        delta = (now - (self._last_frame_time or dt.datetime.now())).total_seconds()
-        self._last_frame_time = now
-        if self.tweener:
-            self.tweener.update(delta)
-
-        self.fps = 1 / delta
+        if self._tracks_damage():
+            # tweens have been updated when queuing the damage
+            has_clip, clip = gdk.cairo_get_clip_rectangle(context)
+            if has_clip:
+                self._clip_box = (clip.x, clip.y, clip.x + clip.width, clip.y + clip.height)
+            else:
+                self._clip_box = (0, 0, int(math.ceil(self.width)), int(math.ceil(self.height)))
+        else:
+            self._update_tweens()
 
         # start drawing
         self.emit("on-enter-frame", context)
         for sprite in self._z_ordered_sprites:
             sprite._draw(context)
+        self._clip_box = None
 
         self.__check_mouse(self.mouse_x, self.mouse_y)
         self.emit("on-finish-frame", context)
@@ -2234,3 +2948,264 @@ class Scene(Parent, gtk.DrawingArea):
         if not handled:
             self.emit("on-key-release", event)
         return True
+
+
+
+class OffscreenScene(BaseScene, gobject.GObject):
+    """Renders sprites into a cairo.ImageSurface on demand, without a
+    window, a display or the gtk main loop. The clock is manual - tweens
+    move only when told so with :func:`advance`. Good for render
+    benchmarks, pixel tests and thumbnails.
+
+    With partial_redraw the surface passed back to :func:`render` gets
+    repainted only where the sprites have changed since the previous render.
+
+    Example::
+        scene = OffscreenScene(200, 100, background_color="#333")
+        scene.add_child(Rectangle(50, 50, fill="#f00"))
+        scene.advance(0.5)
+        scene.render().write_to_png("thumbnail.png")
+    """
+    __gsignals__ = {
+        "on-enter-frame": (gobject.SIGNAL_RUN_LAST, gobject.TYPE_NONE, (gobject.TYPE_PYOBJECT, )),
+        "on-finish-frame": (gobject.SIGNAL_RUN_LAST, gobject.TYPE_NONE, (gobject.TYPE_PYOBJECT, )),
+        "on-resize": (gobject.SIGNAL_RUN_LAST, gobject.TYPE_NONE, (gobject.TYPE_PYOBJECT, )),
+    }
+
+    def __init__(self, width, height, background_color = None, partial_redraw = False):
+        gobject.GObject.__init__(self)
+
+        #: list of sprites in scene. use :func:`add_child` to add sprites
+        self.sprites = []
+        self._z_ordered_sprites = []
+
+        # a place where to store child handlers
+        self._child_handlers = defaultdict(list)
+
+        #: size of the rendered image in pixels
+        self.width, self.height = width, height
+
+        #: Background color of the scene. Use either a string with hex color
+        #: or an RGB triplet. None leaves the image transparent.
+        self.background_color = background_color
+
+        #: instance of :class:`pytweener.VectorTweener` that is used by :func:`animate`
+        self.tweener = False
+        if pytweener:
+            self.tweener = pytweener.VectorTweener(0.4, pytweener.Easing.Cubic.ease_in_out)
+
+        #: seconds on the manual clock
+        self.time = 0
+
+        #: Repaint just the areas of the sprites that have changed since
+        #: the previous render, on the surface passed back to :func:`render`
+        self.partial_redraw = partial_redraw
+
+        self._focus_sprite = None
+        self._damaged = set() # sprites changed since the last render
+        self._damage_boxes = [] # and the boxes they had covered before the change
+        self._clip_box = None # box being redrawn, None draws it all
+        self._full_redraw = True
+
+
+    # the bits of the scene that the sprites count on
+    def from_scene_coords(self, x, y): return x, y
+    def to_scene_coords(self, x, y): return x, y
+    def get_matrix(self): return cairo.Matrix()
+    def get_scene(self): return self
+
+    def redraw(self):
+        """repaint all of the scene on the next render"""
+        self._full_redraw = True
+
+    def _tracks_damage(self):
+        return self.partial_redraw
+
+
+    def animate(self, sprite, duration = None, easing = None, on_complete = None,
+                on_update = None, round = False, **kwargs):
+        """Interpolate attributes of the given object using the internal
+        tweener. The tweens move as the clock is advanced"""
+        if not self.tweener: # here we complain
+            raise Exception("pytweener was not found. Include it to enable animations")
+
+        return self.tweener.add_tween(sprite,
+                                      duration=duration,
+                                      easing=easing,
+                                      on_complete=on_complete,
+                                      on_update=on_update,
+                                      round=round,
+                                      **kwargs)
+
+    def after(self, sprite, delay, callback):
+        """Call callback(sprite) once the clock has moved on by delay seconds"""
+        if not self.tweener: # here we complain
+            raise Exception("pytweener was not found. Include it to enable animations")
+
+        return self.tweener.add_callback(sprite, delay, callback)
+
+    def sequence(self, steps, on_complete = None):
+        """Run the generator as a :class:`Sequence` on the manual clock"""
+        return Sequence(self, steps, on_complete)
+
+    def stop_animation(self, sprites):
+        """stop animation without firing on_complete"""
+        if isinstance(sprites, list) is False:
+            sprites = [sprites]
+
+        for sprite in sprites:
+            self.tweener.kill_tweens(sprite)
+
+    def batch(self):
+        """context manager that invalidates and redraws the sprites changed
+        within it just once, see :func:`batch`"""
+        return batch()
+
+
+    def advance(self, seconds):
+        """move the clock forward, updating the tweens"""
+        self.time += seconds
+        if self.tweener:
+            with batch():
+                self.tweener.update(seconds)
+
+
+    def render(self, surface = None):
+        """draw the scene and return the surface. Pass in an image surface
+        of the scene's size to reuse it, otherwise a new one gets created"""
+        full_redraw, self._full_redraw = self._full_redraw, False
+        if surface is None:
+            surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, int(self.width), int(self.height))
+            full_redraw = True
+
+        context = cairo.Context(surface)
+        if self._tracks_damage():
+            boxes = self._measure_damage()
+            if full_redraw:
+                self._clip_box = (0, 0, int(math.ceil(self.width)), int(math.ceil(self.height)))
+            else:
+                for x1, y1, x2, y2 in boxes:
+                    context.rectangle(x1, y1, x2 - x1, y2 - y1)
+                context.clip()
+                x1, y1, x2, y2 = context.clip_extents()
+                self._clip_box = (int(x1), int(y1), int(math.ceil(x2)), int(math.ceil(y2)))
+
+        if self.background_color:
+            context.set_source_rgb(*Colors.parse(self.background_color)[:3])
+        else:
+            context.set_source_rgba(0, 0, 0, 0)
+        context.set_operator(cairo.OPERATOR_SOURCE)
+        context.paint()
+        context.set_operator(cairo.OPERATOR_OVER)
+
+        self.emit("on-enter-frame", context)
+        for sprite in self._z_ordered_sprites:
+            sprite._draw(context)
+        self._clip_box = None
+        self.emit("on-finish-frame", context)
+
+        surface.flush()
+        return surface
+
+
+if __name__ == "__main__":
+    # Qix._update_children style bulk updates: a parent with 15 shadows, all
+    # moved and turned on every tick. attribute by attribute, one set() per
+    # shadow, and the per attribute writes within one batch()
+    import timeit
+
+    def qix_tree(scene):
+        qix = Sprite()
+        for i in range(15):
+            qix.add_child(Rectangle(20, 20, pivot_x=10, pivot_y=10, fill="#afe"))
+        scene.add_child(qix)
+        return qix
+
+    def with_setattr(qix):
+        qix.x += 1
+        for i, sprite in enumerate(qix.sprites):
+            sprite.x, sprite.y = i * 3 - qix.x, i * 2 - qix.x
+            sprite.rotation += 0.05
+
+    def with_set(qix):
+        qix.x += 1
+        for i, sprite in enumerate(qix.sprites):
+            sprite.set(x=i * 3 - qix.x, y=i * 2 - qix.x, rotation=sprite.rotation + 0.05)
+
+    def with_batch(qix):
+        with batch():
+            with_setattr(qix)
+
+    rounds = 2000
+    print("%d bulk updates of 15 children" % rounds)
+    for partial_redraw in (False, True):
+        print("  partial redraw %s" % ("on" if partial_redraw else "off"))
+        for update in (with_setattr, with_set, with_batch):
+            qix = qix_tree(OffscreenScene(640, 480, partial_redraw=partial_redraw))
+            duration = timeit.timeit(lambda: update(qix), number=rounds)
+            print("    %-13s %.3fs (%.1fus per update)" % (update.__name__, duration, duration * 1000000 / rounds))
+
+
+    # matrices made by the draw pipeline in a frame - without changes the
+    # world matrices of the previous frame do. counted by wrapping the
+    # methods that make them
+    made = [0]
+
+    def counting(method, makes):
+        def counted(self, *args):
+            made[0] += makes(self, *args)
+            return method(self, *args)
+        return counted
+
+    Sprite._local_matrix = counting(Sprite._local_matrix,
+                                    lambda sprite: sprite._matrix is None)
+    Sprite._world_matrix_for = counting(Sprite._world_matrix_for,
+                                        lambda sprite, parent_matrix: sprite.__dict__['_world_matrix'] is None or
+                                                                      sprite.__dict__['_world_parent'] is not parent_matrix)
+    Sprite._measure_tree = counting(Sprite._measure_tree,
+                                    lambda sprite, parent_matrix, boxes: sprite.visible is not False)
+    for cls in (Sprite, OffscreenScene):
+        cls.get_matrix = counting(cls.get_matrix, lambda sprite: 1)
+
+
+    def populate(scene):
+        groups = []
+        for i in range(20):
+            group = Sprite(x=i * 30, y=i * 20)
+            for j in range(15):
+                group.add_child(Rectangle(20, 20, x=j * 3, y=j * 2, pivot_x=10, pivot_y=10, fill="#afe"))
+            groups.append(group)
+        scene.add_child(*groups)
+        return groups
+
+    def report(title, groups, draw):
+        def count(change):
+            change()
+            before = made[0]
+            draw()
+            return made[0] - before
+
+        def move_group():
+            groups[0].x += 1
+
+        def move_all():
+            for group in groups:
+                for sprite in group.sprites:
+                    sprite.rotation += 0.05
+
+        draw()
+        print()
+        print("matrices made per frame of %d sprites, %s" % (len(groups) * 16, title))
+        print("  nothing changed:    %d" % count(lambda: None))
+        print("  one group moved:    %d" % count(move_group))
+        print("  all sprites turned: %d" % count(move_all))
+
+
+    for partial_redraw in (False, True):
+        scene = OffscreenScene(640, 480, partial_redraw=partial_redraw)
+        groups = populate(scene)
+        surface = scene.render()
+        # partial redraw also measures the damaged trees and looks up their
+        # parent matrices before drawing within the damage
+        report("partial redraw" if partial_redraw else "full redraw", groups,
+               lambda: scene.render(surface))
@@ -285,7 +285,7 @@ class Widget(graphics.Sprite):
         """width in pixels"""
         alloc_w = self.alloc_w
 
-        if self.parent and isinstance(self.parent, graphics.Scene):
+        if self.parent and isinstance(self.parent, graphics.BaseScene):
             alloc_w = self.parent.width
 
             def res(scene, event):
@@ -311,7 +311,7 @@ class Widget(graphics.Sprite):
         """height in pixels"""
         alloc_h = self.alloc_h
 
-        if self.parent and isinstance(self.parent, graphics.Scene):
+        if self.parent and isinstance(self.parent, graphics.BaseScene):
             alloc_h = self.parent.height
 
         min_height = (self.min_height or 0) + self.margin_top + self.margin_bottom
@@ -475,20 +475,23 @@ class Container(Widget):
         width = self.width - self.horizontal_padding
         height = self.height - self.vertical_padding
 
-        for sprite, props in (get_props(sprite) for sprite in self.sprites if sprite.visible):
-            sprite.alloc_w = width
-            sprite.alloc_h = height
+        # allocations and positions of all the children get invalidated
+        # together, once per child
+        with graphics.batch():
+            for sprite, props in (get_props(sprite) for sprite in self.sprites if sprite.visible):
+                sprite.alloc_w = width
+                sprite.alloc_h = height
 
-            w, h = getattr(sprite, "width", 0), getattr(sprite, "height", 0)
-            if hasattr(sprite, "get_height_for_width_size"):
-                w2, h2 = sprite.get_height_for_width_size()
-                w, h = max(w, w2), max(h, h2)
+                w, h = getattr(sprite, "width", 0), getattr(sprite, "height", 0)
+                if hasattr(sprite, "get_height_for_width_size"):
+                    w2, h2 = sprite.get_height_for_width_size()
+                    w, h = max(w, w2), max(h, h2)
 
-            w = w * sprite.scale_x + props["margin_left"] + props["margin_right"]
-            h = h * sprite.scale_y + props["margin_top"] + props["margin_bottom"]
+                w = w * sprite.scale_x + props["margin_left"] + props["margin_right"]
+                h = h * sprite.scale_y + props["margin_top"] + props["margin_bottom"]
 
-            sprite.x = self.padding_left + props["margin_left"] + (max(sprite.alloc_w * sprite.scale_x, w) - w) * getattr(sprite, "x_align", 0)
-            sprite.y = self.padding_top + props["margin_top"] + (max(sprite.alloc_h * sprite.scale_y, h) - h) * getattr(sprite, "y_align", 0)
+                sprite.set(x=self.padding_left + props["margin_left"] + (max(sprite.alloc_w * sprite.scale_x, w) - w) * getattr(sprite, "x_align", 0),
+                           y=self.padding_top + props["margin_top"] + (max(sprite.alloc_h * sprite.scale_y, h) - h) * getattr(sprite, "y_align", 0))
 
 
         self.__dict__['_children_resize_queued'] = False
@@ -601,83 +604,86 @@ class Box(Container):
         width = self.width - self.padding_left - self.padding_right
         height = self.height - self.padding_top - self.padding_bottom
 
-        sprites = [get_props(sprite) for sprite in self.sprites if sprite.visible]
+        # allocations and positions of all the children get invalidated
+        # together, once per child
+        with graphics.batch():
+            sprites = [get_props(sprite) for sprite in self.sprites if sprite.visible]
 
-        # calculate if we have any spare space
-        sprite_sizes = []
-        for sprite, props in sprites:
-            if self.orient_horizontal:
-                sprite.alloc_h = height / sprite.scale_y
-                size = get_min_size(sprite)[0]
-                size = size + props["margin_left"] + props["margin_right"]
-            else:
-                sprite.alloc_w = width / sprite.scale_x
-                size = get_min_size(sprite)[1]
+            # calculate if we have any spare space
+            sprite_sizes = []
+            for sprite, props in sprites:
+                if self.orient_horizontal:
+                    sprite.alloc_h = height / sprite.scale_y
+                    size = get_min_size(sprite)[0]
+                    size = size + props["margin_left"] + props["margin_right"]
+                else:
+                    sprite.alloc_w = width / sprite.scale_x
+                    size = get_min_size(sprite)[1]
 
-                if hasattr(sprite, "get_height_for_width_size"):
-                    size = max(size, sprite.get_height_for_width_size()[1] * sprite.scale_y)
-                size = size + props["margin_top"] + props["margin_bottom"]
-            sprite_sizes.append(size)
+                    if hasattr(sprite, "get_height_for_width_size"):
+                        size = max(size, sprite.get_height_for_width_size()[1] * sprite.scale_y)
+                    size = size + props["margin_top"] + props["margin_bottom"]
+                sprite_sizes.append(size)
 
 
-        remaining_space = width if self.orient_horizontal else height
-        if sprite_sizes:
-            remaining_space = remaining_space - sum(sprite_sizes) - self.get_total_spacing()
+            remaining_space = width if self.orient_horizontal else height
+            if sprite_sizes:
+                remaining_space = remaining_space - sum(sprite_sizes) - self.get_total_spacing()
 
 
-        interested_sprites = [sprite for sprite, props in sprites if getattr(sprite, "expand", True)]
+            interested_sprites = [sprite for sprite, props in sprites if getattr(sprite, "expand", True)]
 
 
-        # in order to stay pixel sharp we will recalculate remaining bonus
-        # each time we give up some of the remaining space
-        remaining_interested = len(interested_sprites)
-        bonus = 0
-        if remaining_space > 0 and interested_sprites:
-            bonus = int(remaining_space / remaining_interested)
+            # in order to stay pixel sharp we will recalculate remaining bonus
+            # each time we give up some of the remaining space
+            remaining_interested = len(interested_sprites)
+            bonus = 0
+            if remaining_space > 0 and interested_sprites:
+                bonus = int(remaining_space / remaining_interested)
 
-        actual_h = 0
-        x_pos, y_pos = 0, 0
+            actual_h = 0
+            x_pos, y_pos = 0, 0
 
-        for (sprite, props), min_size in zip(sprites, sprite_sizes):
-            sprite_bonus = 0
-            if sprite in interested_sprites:
-                sprite_bonus = bonus
-                remaining_interested -= 1
-                remaining_space -= bonus
-                if remaining_interested:
-                    bonus = int(float(remaining_space) / remaining_interested)
+            for (sprite, props), min_size in zip(sprites, sprite_sizes):
+                sprite_bonus = 0
+                if sprite in interested_sprites:
+                    sprite_bonus = bonus
+                    remaining_interested -= 1
+                    remaining_space -= bonus
+                    if remaining_interested:
+                        bonus = int(float(remaining_space) / remaining_interested)
 
 
-            if self.orient_horizontal:
-                sprite.alloc_w = (min_size + sprite_bonus) / sprite.scale_x
-            else:
-                sprite.alloc_h = (min_size + sprite_bonus) / sprite.scale_y
+                if self.orient_horizontal:
+                    sprite.alloc_w = (min_size + sprite_bonus) / sprite.scale_x
+                else:
+                    sprite.alloc_h = (min_size + sprite_bonus) / sprite.scale_y
 
-            w, h = getattr(sprite, "width", 0), getattr(sprite, "height", 0)
-            if hasattr(sprite, "get_height_for_width_size"):
-                w2, h2 = sprite.get_height_for_width_size()
-                w, h = max(w, w2), max(h, h2)
+                w, h = getattr(sprite, "width", 0), getattr(sprite, "height", 0)
+                if hasattr(sprite, "get_height_for_width_size"):
+                    w2, h2 = sprite.get_height_for_width_size()
+                    w, h = max(w, w2), max(h, h2)
 
-            w = w * sprite.scale_x + props["margin_left"] + props["margin_right"]
-            h = h * sprite.scale_y + props["margin_top"] + props["margin_bottom"]
+                w = w * sprite.scale_x + props["margin_left"] + props["margin_right"]
+                h = h * sprite.scale_y + props["margin_top"] + props["margin_bottom"]
 
 
-            sprite.x = self.padding_left + x_pos + props["margin_left"] + (max(sprite.alloc_w * sprite.scale_x, w) - w) * getattr(sprite, "x_align", 0.5)
-            sprite.y = self.padding_top + y_pos + props["margin_top"] + (max(sprite.alloc_h * sprite.scale_y, h) - h) * getattr(sprite, "y_align", 0.5)
+                sprite.set(x=self.padding_left + x_pos + props["margin_left"] + (max(sprite.alloc_w * sprite.scale_x, w) - w) * getattr(sprite, "x_align", 0.5),
+                           y=self.padding_top + y_pos + props["margin_top"] + (max(sprite.alloc_h * sprite.scale_y, h) - h) * getattr(sprite, "y_align", 0.5))
 
 
-            actual_h = max(actual_h, h * sprite.scale_y)
+                actual_h = max(actual_h, h * sprite.scale_y)
 
-            if (min_size + sprite_bonus) > 0:
-                if self.orient_horizontal:
-                    x_pos += int(max(w, sprite.alloc_w * sprite.scale_x)) + self.spacing
-                else:
-                    y_pos += max(h, sprite.alloc_h * sprite.scale_y) + self.spacing
+                if (min_size + sprite_bonus) > 0:
+                    if self.orient_horizontal:
+                        x_pos += int(max(w, sprite.alloc_w * sprite.scale_x)) + self.spacing
+                    else:
+                        y_pos += max(h, sprite.alloc_h * sprite.scale_y) + self.spacing
 
 
-        if self.orient_horizontal:
-            for sprite, props in sprites:
-                sprite.__dict__['alloc_h'] = actual_h
+            if self.orient_horizontal:
+                for sprite, props in sprites:
+                    sprite.__dict__['alloc_h'] = actual_h
 
         self.__dict__['_children_resize_queued'] = False
 
@@ -7,20 +7,43 @@
 # Released under M.I.T License - see above url
 # Python version by Ben Harling 2009
 # All kinds of slashing and dashing by Toms Baugis 2010, 2014
+import array
+import functools
+import heapq
+import itertools
 import math
 import collections
 import datetime as dt
 import time
 import re
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 class Tweener(object):
-    def __init__(self, default_duration = None, tween = None):
+    def __init__(self, default_duration = None, tween = None, lookup = False):
         """Tweener
         This class manages all active tweens, and provides a factory for
-        creating and spawning tween motions."""
+        creating and spawning tween motions. With lookup set the easings
+        are swapped for their lookup tables (see :func:`lookup`) where the
+        table stays within LOOKUP_TOLERANCE of the curve.
+
+        Tweens with a delay and the timed callbacks wait in a heap ordered
+        by their start time and join the updated ones only once they are
+        due, so that waiting costs nothing per frame."""
         self.current_tweens = collections.defaultdict(set)
         self.default_easing = tween or Easing.Cubic.ease_in_out
         self.default_duration = default_duration or 1.0
+        self.lookup = lookup
+
+        #: seconds the tweener has been updated for
+        self.time = 0
+
+        self._active = {} # the started tweens, dict for the stable order
+        self._pending = [] # heap of (start time, tie breaker, tween)
+        self._tie_breaker = itertools.count()
 
     def has_tweens(self):
         return len(self.current_tweens) > 0
@@ -37,32 +60,43 @@ class Tweener(object):
             The tweener can handle numbers, dates and color strings in hex ("#ffffff").
             This function performs overwrite style conflict solving - in case
             if a previous tween operates on same attributes, the attributes in
-            question are removed from that tween.
+            question are removed from that tween. A running tween keeps them
+            till a delayed one starts, and the delayed one then goes on from
+            where the running one got.
         """
         if duration is None:
             duration = self.default_duration
 
         easing = easing or self.default_easing
+        if self.lookup:
+            table = lookup(easing)
+            if table.error <= LOOKUP_TOLERANCE:
+                easing = table
 
         tw = Tween(obj, duration, delay, easing, on_complete, on_update, round, **kwargs )
 
+        # the last call wins - the tweens that wait for their start lose the
+        # keys right away, the running ones when this one starts
         if obj in self.current_tweens:
+            keys = set(kwargs.keys())
             for current_tween in tuple(self.current_tweens[obj]):
-                prev_keys = set((key for (key, tweenable) in current_tween.tweenables))
-                dif = prev_keys & set(kwargs.keys())
-
-                for key, tweenable in tuple(current_tween.tweenables):
-                    if key in dif:
-                        current_tween.tweenables.remove((key, tweenable))
-
-                if not current_tween.tweenables:
-                    current_tween.finish()
-                    self.current_tweens[obj].remove(current_tween)
+                if current_tween in self._active:
+                    continue
+                dif = keys & set((key for (key, tweenable) in current_tween.tweenables))
+                if dif:
+                    self._remove_keys(current_tween, dif)
 
-
-        self.current_tweens[obj].add(tw)
+        self._add(tw)
         return tw
 
+    def add_callback(self, obj, delay, callback):
+        """Call callback(obj) in delay seconds. The call goes away with the
+        tweens of the object when they are killed. Returns the timer, which
+        can be passed to :func:`remove_tween`"""
+        timer = Tween(obj, 0, delay, None, callback, None, False)
+        self._add(timer)
+        return timer
+
 
     def get_tweens(self, obj):
         """Get a list of all tweens acting on the specified object
@@ -73,39 +107,252 @@ class Tweener(object):
         """Stop tweening an object, without completing the motion or firing the
         on_complete"""
         if obj:
-            try:
-                del self.current_tweens[obj]
-            except:
-                pass
+            for tween in self.current_tweens.pop(obj, ()):
+                self._active.pop(tween, None)
         else:
             self.current_tweens = collections.defaultdict(set)
+            self._active, self._pending = {}, []
 
     def remove_tween(self, tween):
         """"remove given tween without completing the motion or firing the on_complete"""
-        if tween.target in self.current_tweens and tween in self.current_tweens[tween.target]:
-            self.current_tweens[tween.target].remove(tween)
-            if not self.current_tweens[tween.target]:
-                del self.current_tweens[tween.target]
+        if tween in self.current_tweens.get(tween.target, ()):
+            self._drop(tween)
 
     def finish(self):
         """jump the the last frame of all tweens"""
         for obj in self.current_tweens:
             for tween in self.current_tweens[obj]:
                 tween.finish()
-        self.current_tweens = {}
+        self.current_tweens = collections.defaultdict(set)
+        self._active, self._pending = {}, []
 
     def update(self, delta_seconds):
         """update tweeners. delta_seconds is time in seconds since last frame"""
+        self._start_due(delta_seconds)
+
+        for tween in tuple(self._active):
+            if tween not in self._active:
+                continue # removed by a callback on the way
+
+            done = tween.update(delta_seconds)
+            if done:
+                self._drop(tween)
+                if tween.on_complete: tween.on_complete(tween.target)
+
+        return self.current_tweens
+
+
+    def _add(self, tween):
+        self.current_tweens[tween.target].add(tween)
+        if tween.delay > 0:
+            heapq.heappush(self._pending, (self.time + tween.delay, next(self._tie_breaker), tween))
+        else:
+            self._activate(tween)
+
+    def _activate(self, tween):
+        # the running tweens of the object let go of the keys of the one
+        # starting. they are all older, as the newer ones have taken the keys
+        # from this one while it waited
+        keys = set((key for (key, tweenable) in tween.tweenables))
+        if keys:
+            for current_tween in tuple(self.current_tweens[tween.target]):
+                if current_tween is tween or current_tween not in self._active:
+                    continue
+                dif = keys & set((key for (key, tweenable) in current_tween.tweenables))
+                if dif:
+                    self._remove_keys(current_tween, dif)
+
+        self._active[tween] = None
+
+    def _drop(self, tween):
+        obj_tweens = self.current_tweens[tween.target]
+        obj_tweens.discard(tween)
+        if not obj_tweens:
+            del self.current_tweens[tween.target]
+        self._active.pop(tween, None)
+
+    def _remove_keys(self, tween, keys):
+        """stop tweening the given attributes, and the tween altogether
+        once it has nothing left to tween"""
+        for key, tweenable in tuple(tween.tweenables):
+            if key in keys:
+                tween.tweenables.remove((key, tweenable))
+
+        if not tween.tweenables:
+            tween.finish()
+            self._drop(tween)
+
+    def _start_due(self, delta_seconds):
+        """move the clock and start the tweens that are due in this frame"""
+        frame_start = self.time
+        self.time += delta_seconds
+
+        pending = self._pending
+        while pending and pending[0][0] <= self.time:
+            start, tie_breaker, tween = heapq.heappop(pending)
+            if tween not in self.current_tweens.get(tween.target, ()):
+                continue # killed while waiting
+
+            # the update that follows adds the whole frame, so back off by
+            # the part of it that passed before the start
+            tween.delta = tween.delay - (start - frame_start)
+
+            # the running tweens may have moved the attributes on while this
+            # one waited, so it goes from where they are now
+            tween.tweenables = set(((key, Tweenable(getattr(tween.target, key), tweenable.target_value))
+                                    for key, tweenable in tween.tweenables))
+            self._activate(tween)
+
+
+class VectorTweener(Tweener):
+    """Tweener that keeps the numbers of the numeric tweens in numpy arrays
+    and moves them all in one go - the fractions of all the tweens in a
+    single pass, and the easing once per distinct fraction, which bursts
+    like explosions share. Colors, dates and everything when numpy is not
+    around go the usual way. The tweens are the same Tween objects, the
+    arrays are rebuilt whenever the set of tweens changes"""
+
+    def __init__(self, default_duration = None, tween = None, lookup = False):
+        Tweener.__init__(self, default_duration, tween, lookup)
+        self._version = 0 # bumped on every change to the set of the tweens
+        self._built = None # version the arrays have been built for
+        self._tweens = [] # the tweens in the arrays
+
+    def kill_tweens(self, obj = None):
+        self._version += 1
+        Tweener.kill_tweens(self, obj)
+
+    def _activate(self, tween):
+        self._version += 1
+        Tweener._activate(self, tween)
+
+    def _drop(self, tween):
+        self._version += 1
+        Tweener._drop(self, tween)
+
+    def _remove_keys(self, tween, keys):
+        self._version += 1 # the rows of the keys go
+        Tweener._remove_keys(self, tween, keys)
+
+    def finish(self):
+        self._sync()
+        self._version += 1
+        Tweener.finish(self)
+
+
+    def _sync(self):
+        """pass the time the arrays have counted on to the tweens"""
+        if self._tweens:
+            for tween, elapsed in zip(self._tweens, self._elapsed.tolist()):
+                tween.delta = elapsed
+
+    def _build(self):
+        self._sync()
+
+        self._tweens, self._rest = [], []
+        for tween in self._active:
+            if tween.tweenables and all(tweenable.numeric for key, tweenable in tween.tweenables):
+                self._tweens.append(tween)
+            else:
+                self._rest.append(tween)
+
+        # per tween
+        tweens = self._tweens
+        self._elapsed = np.array([tween.delta for tween in tweens], dtype=float)
+        self._delay = np.array([tween.delay for tween in tweens], dtype=float)
+        self._duration = np.array([tween.duration for tween in tweens], dtype=float)
+        self._total = self._delay + self._duration
+
+        groups = collections.defaultdict(list)
+        for i, tween in enumerate(tweens):
+            groups[tween.ease].append(i)
+        self._groups = []
+        for ease, indices in groups.items():
+            table = getattr(ease, "table", None)
+            if table is not None:
+                table = (np.linspace(0, 1, len(table)), np.frombuffer(table))
+            self._groups.append((ease, table, np.array(indices)))
+        self._with_on_update = [tween for tween in tweens if tween.on_update]
+
+        # per tweened attribute
+        row_tween, start, change = [], [], []
+        self._row_targets, self._row_keys, self._row_final, self._row_round = [], [], [], []
+        for i, tween in enumerate(tweens):
+            for key, tweenable in tween.tweenables:
+                row_tween.append(i)
+                start.append(tweenable.start_value)
+                change.append(tweenable.change)
+                self._row_targets.append(tween.target)
+                self._row_keys.append(key)
+                self._row_final.append(tweenable.target_value)
+                self._row_round.append(tween.round)
+
+        self._row_tween = np.array(row_tween, dtype=int)
+        self._start = np.array(start, dtype=float)
+        self._change = np.array(change, dtype=float)
+
+        self._built = self._version
+
 
-        for obj in tuple(self.current_tweens):
-            for tween in tuple(self.current_tweens[obj]):
-                done = tween.update(delta_seconds)
-                if done:
-                    self.current_tweens[obj].remove(tween)
-                    if tween.on_complete: tween.on_complete(tween.target)
+    def update(self, delta_seconds):
+        if np is None:
+            return Tweener.update(self, delta_seconds)
+
+        self._start_due(delta_seconds)
+        if self._built != self._version:
+            self._build()
+
+        finished = []
+        if self._tweens:
+            elapsed = np.minimum(self._elapsed + delta_seconds, self._total)
+            self._elapsed = elapsed
+            started = elapsed >= self._delay
+            done = elapsed >= self._total
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                fractions = (elapsed - self._delay) / self._duration
+
+            eased = np.ones(len(self._tweens))
+            running = started & ~done
+            for ease, table, indices in self._groups:
+                indices = indices[running[indices]]
+                if not len(indices):
+                    continue
+                if table is not None:
+                    eased[indices] = np.interp(fractions[indices], *table)
+                else:
+                    distinct, inverse = np.unique(fractions[indices], return_inverse=True)
+                    eased[indices] = np.array([ease(fraction) for fraction in distinct.tolist()])[inverse]
+
+            rows = self._row_tween
+            values = (self._start + self._change * eased[rows]).tolist()
+            row_done = done[rows].tolist()
+            targets, keys, finals, rounds = self._row_targets, self._row_keys, self._row_final, self._row_round
+            for i in np.flatnonzero(started[rows]).tolist():
+                if row_done[i]:
+                    setattr(targets[i], keys[i], finals[i])
+                elif rounds[i]:
+                    setattr(targets[i], keys[i], int(values[i]))
+                else:
+                    setattr(targets[i], keys[i], values[i])
+
+            for tween in self._with_on_update:
+                tween.on_update(tween.target)
+
+            finished = [self._tweens[i] for i in np.flatnonzero(done).tolist()]
+
+        # the colors and dates
+        for tween in self._rest:
+            if tween in self._active and tween.update(delta_seconds):
+                finished.append(tween)
 
-            if not self.current_tweens[obj]:
-                del self.current_tweens[obj]
+        for tween in finished:
+            tween.complete = True
+            if tween not in self._active:
+                continue # killed on the way
+
+            self._drop(tween)
+            if tween.on_complete: tween.on_complete(tween.target)
 
         return self.current_tweens
 
@@ -186,9 +433,16 @@ class Tween(object):
 
 
 
+class RGB(tuple):
+    """color as a tuple of red, green and blue, all in the 0..1 range.
+    The color tweens hand these out instead of hex strings, so that drawing
+    the in-between colors takes no parsing"""
+    __slots__ = ()
+
+
 class Tweenable(object):
     """a single attribute that has to be tweened from start to target"""
-    __slots__ = ('start_value', 'change', 'decode_func', 'target_value', 'update')
+    __slots__ = ('start_value', 'change', 'decode_func', 'target_value', 'update', 'numeric')
 
     hex_color_normal = re.compile("#([a-fA-F0-9]{2})([a-fA-F0-9]{2})([a-fA-F0-9]{2})")
     hex_color_short = re.compile("#([a-fA-F0-9])([a-fA-F0-9])([a-fA-F0-9])")
@@ -198,6 +452,9 @@ class Tweenable(object):
         self.decode_func = lambda x: x
         self.target_value = target_value
 
+        #: plain number going from start_value by change
+        self.numeric = False
+
         def float_update(fraction):
             return self.start_value + self.change * fraction
 
@@ -208,14 +465,15 @@ class Tweenable(object):
             return dt.datetime.fromtimestamp(self.start_value + self.change * fraction)
 
         def color_update(fraction):
-            val = [max(min(self.start_value[i] + self.change[i] * fraction, 255), 0)  for i in range(3)]
-            return "#" + "".join(["%02x" % int(v) for v in val])
+            return RGB([max(min(start + change * fraction, 1), 0)
+                        for start, change in zip(self.start_value, self.change)])
 
 
         if isinstance(start_value, int) or isinstance(start_value, float):
             self.start_value = start_value
             self.change = target_value - start_value
             self.update = float_update
+            self.numeric = True
         else:
             if isinstance(start_value, dt.datetime) or isinstance(start_value, dt.date):
                 if isinstance(start_value, dt.datetime):
@@ -227,26 +485,33 @@ class Tweenable(object):
                 self.start_value = self.decode_func(start_value)
                 self.change = self.decode_func(target_value) - self.start_value
 
-            elif isinstance(start_value, str) \
+            elif isinstance(start_value, RGB) or isinstance(start_value, str) \
              and (self.hex_color_normal.match(start_value) or self.hex_color_short.match(start_value)):
                 self.update = color_update
-                if self.hex_color_normal.match(start_value):
-                    self.decode_func = lambda val: [int(match, 16)
-                                                    for match in self.hex_color_normal.match(val).groups()]
+                self.decode_func = self.decode_color
+                self.start_value = self.decode_color(start_value)
+                self.change = [target - start for start, target in zip(self.start_value,
+                                                                       self.decode_color(target_value))]
 
-                elif self.hex_color_short.match(start_value):
-                    self.decode_func = lambda val: [int(match + match, 16)
-                                                    for match in self.hex_color_short.match(val).groups()]
 
-                if self.hex_color_normal.match(target_value):
-                    target_value = [int(match, 16)
-                                    for match in self.hex_color_normal.match(target_value).groups()]
-                else:
-                    target_value = [int(match + match, 16)
-                                    for match in self.hex_color_short.match(target_value).groups()]
+    @classmethod
+    def decode_color(cls, color):
+        """normalized [r, g, b] of a hex string, RGB or an rgb triplet -
+        in the 0..255 range when any of it is over 1, as graphics.Colors
+        takes them"""
+        if isinstance(color, RGB):
+            return list(color)
 
-                self.start_value = self.decode_func(start_value)
-                self.change = [target - start for start, target in zip(self.start_value, target_value)]
+        if isinstance(color, str):
+            match = cls.hex_color_normal.match(color)
+            if match:
+                return [int(c, 16) / 255.0 for c in match.groups()]
+            return [int(c + c, 16) / 255.0 for c in cls.hex_color_short.match(color).groups()]
+
+        rgb = list(color[:3])
+        if max(rgb) > 1:
+            rgb = [c / 255.0 for c in rgb]
+        return rgb
 
 
 
@@ -269,6 +534,55 @@ def symmetric(ease_in, ease_out):
         return ease_out((t - 0.5) * 2, *args, **kwargs) / 2 + 0.5
     return real_symmetric
 
+#: samples in a lookup table - the linear interpolation error of a smooth
+#: curve is within max|f''| / (8 * LOOKUP_SAMPLES ** 2)
+LOOKUP_SAMPLES = 2048
+
+#: largest deviation from the curve the tweener accepts from a lookup table.
+#: curves with a jump or an infinite slope (Expo, Circ) stay exact
+LOOKUP_TOLERANCE = 0.001
+
+#: lookup tables kept around, the least recently used go first
+LOOKUP_CACHE = 32
+
+def lookup(ease, samples = LOOKUP_SAMPLES):
+    """samples the easing curve once into a table of samples + 1 floats and
+    returns a function that interpolates linearly between them. The function
+    carries the samples in `table`, the original curve in `exact` and in
+    `error` the largest deviation from the curve found between the samples.
+    The last LOOKUP_CACHE tables made are kept for reuse.
+
+    A table pays off only for the curves that are expensive to work out -
+    Elastic, Sine, and the ease_out and ease_in_out variants that go through
+    an extra call. The curves written out directly, like Cubic.ease_in,
+    Back.ease_in or Bounce.ease_out, are faster computed."""
+    if hasattr(ease, "table"):
+        return ease
+    return _lookup(ease, samples)
+
+@functools.lru_cache(maxsize=LOOKUP_CACHE)
+def _lookup(ease, samples):
+    table = array.array("d", [ease(i / float(samples)) for i in range(samples + 1)])
+    values = table.tolist() + [table[-1]] # padded so that t = 1 needs no check
+
+    def real_lookup(t):
+        position = t * samples
+        i = int(position)
+        value = values[i]
+        return value + (values[i + 1] - value) * (position - i)
+
+    # linear interpolation strays the most around the middle of a step, check
+    # the quarters of each
+    error = 0
+    for i in range(samples):
+        for quarter in (0.25, 0.5, 0.75):
+            t = (i + quarter) / samples
+            error = max(error, abs(real_lookup(t) - ease(t)))
+
+    real_lookup.table, real_lookup.exact, real_lookup.error = table, ease, error
+    return real_lookup
+
+
 class Symmetric(object):
     def __init__(self, ease_in = None, ease_out = None):
         self.ease_in = ease_in or inverse(ease_out)
@@ -345,29 +659,61 @@ class _Dummy(object):
 if __name__ == "__main__":
     import datetime as dt
 
-    tweener = Tweener()
-    objects = []
+    for tweener in (Tweener(), Tweener(lookup=True), VectorTweener(), VectorTweener(lookup=True)):
+        print(tweener.__class__.__name__ + (" with lookup tables" if tweener.lookup else ""))
+        objects = []
 
-    object_count, update_times = 1000, 100
+        object_count, update_times = 1000, 100
 
-    for i in range(object_count):
-        objects.append(_Dummy(i-100, i-100, i-100))
+        for i in range(object_count):
+            objects.append(_Dummy(i-100, i-100, i-100))
 
 
-    total = dt.datetime.now()
+        total = dt.datetime.now()
+
+        t = dt.datetime.now()
+        print("Adding %d tweens..." % object_count)
+        for i, o in enumerate(objects):
+            tweener.add_tween(o, a = i,
+                                 b = i,
+                                 c = i,
+                                 duration = 0.1 * update_times,
+                                 easing=Easing.Cubic.ease_in_out)
+        print(dt.datetime.now() - t)
+
+        t = dt.datetime.now()
+        print("Updating %d times......" % update_times)
+        for i in range(update_times):  #update 1000 times
+            tweener.update(0.1)
+        print(dt.datetime.now() - t)
 
-    t = dt.datetime.now()
-    print("Adding %d tweens..." % object_count)
-    for i, o in enumerate(objects):
-        tweener.add_tween(o, a = i,
-                             b = i,
-                             c = i,
-                             duration = 0.1 * update_times,
-                             easing=Easing.Circ.ease_in_out)
-    print(dt.datetime.now() - t)
 
+    print()
+    tweener = Tweener()
+    for i, o in enumerate(objects):
+        tweener.add_tween(o, a=0, delay=10 + i * 0.01)
+        tweener.add_callback(o, 20 + i * 0.01, lambda o: None)
     t = dt.datetime.now()
-    print("Updating %d times......" % update_times)
-    for i in range(update_times):  #update 1000 times
-        tweener.update(0.1)
+    print("Updating %d times with %d tweens and %d callbacks waiting..." % (update_times * 10, object_count, object_count))
+    for i in range(update_times * 10):
+        tweener.update(0.001)
     print(dt.datetime.now() - t)
+
+    print()
+    print("Easing lookup tables, %d samples, %d calls each" % (LOOKUP_SAMPLES, 100000))
+    import timeit
+    fractions = [i / 100000.0 for i in range(100000)]
+    exact_total = table_total = 0
+    for name, curves in sorted(vars(Easing).items()):
+        if not isinstance(curves, Symmetric) or name == "Strong":
+            continue
+        for kind in ("ease_in", "ease_out", "ease_in_out"):
+            ease = getattr(curves, kind)
+            table = lookup(ease)
+            exact = min(timeit.repeat(lambda: [ease(t) for t in fractions], number=1, repeat=5))
+            tabled = min(timeit.repeat(lambda: [table(t) for t in fractions], number=1, repeat=5))
+            exact_total, table_total = exact_total + exact, table_total + tabled
+            print("%-20s exact %6.1fms  table %6.1fms  error %.1e%s" % (
+                "%s.%s" % (name, kind), exact * 1000, tabled * 1000, table.error,
+                "" if table.error <= LOOKUP_TOLERANCE else "  (stays exact)"))
+    print("all easings: exact %.1fms, table %.1fms" % (exact_total * 1000, table_total * 1000))
@@ -0,0 +1,184 @@
+# - coding: utf-8 -
+# Copyright (C) 2013-2014 Toms Bauģis <toms.baugis at gmail.com>
+
+"""Recording of play sessions and their replay on the headless sim.Board.
+The board rolls all its dice from its seed, so the seed and the inputs of
+every tick are all it takes to play the session again - without gtk and as
+fast as the board can go.
+
+The log is a short header followed by records, each starting with a byte:
+
+    B - new board: seed, sparks, qix and the dots of the start area
+    S - a run of steps with the same inputs: count, inputs byte
+    T - a run of ticks without the player (game over): count
+    R - the cube respawned after a death
+
+Usage: python -m apx.replay session.log
+"""
+
+import struct
+import time
+
+from . import sim
+
+MAGIC = b"APX\x01"
+
+_directions = [None, sim.LEFT, sim.RIGHT, sim.UP, sim.DOWN]
+_claim_bit, _slow_bit = 8, 16
+_max_run = 0xffff
+
+
+def encode_inputs(inputs):
+    """squeeze sim.Inputs into a byte"""
+    res = _directions.index(inputs.direction)
+    if inputs.claim:
+        res |= _claim_bit
+    if inputs.slow:
+        res |= _slow_bit
+    return res
+
+def decode_inputs(byte):
+    return sim.Inputs(_directions[byte & 7], bool(byte & _claim_bit), bool(byte & _slow_bit))
+
+
+class Recorder(object):
+    """writes the session into the given binary file object. consecutive
+    ticks with the same inputs go in as a single run"""
+    def __init__(self, stream):
+        self.stream = stream
+        self.stream.write(MAGIC)
+        self._run = None # (record, inputs byte) of the pending run
+        self._run_length = 0
+
+    def new_board(self, board):
+        """start recording the given freshly created sim.Board"""
+        self._flush()
+        area = board._start_game_area
+        self.stream.write(b"B" + struct.pack("<QBBH", board.seed, len(board.sparks_waiting),
+                                             len(board.qix), len(area)))
+        self.stream.write(b"".join(struct.pack("<ii", int(x), int(y)) for x, y in area))
+
+    def step(self, inputs):
+        self._add((b"S", encode_inputs(inputs)))
+
+    def tick(self):
+        self._add((b"T", None))
+
+    def respawn(self):
+        self._flush()
+        self.stream.write(b"R")
+
+    def close(self):
+        self._flush()
+        self.stream.close()
+
+    def _add(self, run):
+        if run != self._run or self._run_length == _max_run:
+            self._flush()
+            self._run = run
+        self._run_length += 1
+
+    def _flush(self):
+        if self._run_length:
+            record, inputs = self._run
+            if record == b"S":
+                self.stream.write(record + struct.pack("<HB", self._run_length, inputs))
+            else:
+                self.stream.write(record + struct.pack("<H", self._run_length))
+        self._run, self._run_length = None, 0
+
+
+def read(stream):
+    """goes through the records of the log and yields (record, args) tuples:
+    ("B", (start_area, seed, sparks, qix)), ("S", (count, inputs)),
+    ("T", (count,)) and ("R", ())"""
+    def unpack(fmt):
+        return struct.unpack(fmt, stream.read(struct.calcsize(fmt)))
+
+    if stream.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not an apx session log")
+
+    while True:
+        record = stream.read(1)
+        if not record:
+            return
+
+        if record == b"B":
+            seed, sparks, qix, dots = unpack("<QBBH")
+            area = [unpack("<ii") for i in range(dots)]
+            yield "B", (area, seed, sparks, qix)
+        elif record == b"S":
+            count, inputs = unpack("<HB")
+            yield "S", (count, decode_inputs(inputs))
+        elif record == b"T":
+            yield "T", unpack("<H")
+        elif record == b"R":
+            yield "R", ()
+        else:
+            raise ValueError("unknown record %r" % record)
+
+
+def replay(stream, on_tick=None):
+    """plays the recorded session on sim.Board at full speed and returns the
+    list of the boards played. on_tick(board, events, duration) is called
+    after each tick with its duration in seconds"""
+    clock = time.perf_counter
+    boards = []
+    board = None
+    for record, args in read(stream):
+        if record == "B":
+            area, seed, sparks, qix = args
+            board = sim.Board(area, sparks, qix, seed)
+            boards.append(board)
+
+        elif record == "R":
+            board.respawn()
+
+        else:
+            count, inputs = args[0], None
+            if record == "S":
+                inputs = args[1]
+
+            for i in range(count):
+                t = clock()
+                events = board.step(inputs) if inputs is not None else board.tick()
+                if on_tick:
+                    on_tick(board, events, clock() - t)
+    return boards
+
+
+if __name__ == "__main__":
+    import sys
+
+    durations = [] # (duration, board number, tick)
+    counts = {"claimed": 0, "death": 0}
+    board_numbers = {}
+
+    def on_tick(board, events, duration):
+        number = board_numbers.setdefault(board, len(board_numbers) + 1)
+        durations.append((duration, number, board.ticks))
+        for event in events:
+            if event[0] in counts:
+                counts[event[0]] += 1
+
+    with open(sys.argv[1], "rb") as stream:
+        t = time.perf_counter()
+        boards = replay(stream, on_tick)
+        total = time.perf_counter() - t
+
+    if not durations:
+        print("no ticks in the log")
+        sys.exit()
+
+    ordered = sorted(durations)
+    print("%d boards, %d ticks, %d claims, %d deaths in %.2fs" % (len(boards), len(durations),
+                                                                  counts["claimed"], counts["death"],
+                                                                  total))
+    print("tick: mean %.3fms, median %.3fms, 99%% %.3fms" % (
+        sum(d for d, board, tick in durations) * 1000 / len(durations),
+        ordered[len(ordered) // 2][0] * 1000,
+        ordered[int(len(ordered) * 0.99)][0] * 1000))
+
+    print("slowest ticks:")
+    for duration, board, tick in reversed(ordered[-5:]):
+        print("  board %d, tick %d: %.3fms" % (board, tick, duration * 1000))
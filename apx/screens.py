@@ -191,11 +191,13 @@ class GameOverScreen(layout.Container):
         self.prompt.y = self.name_input.y + 25
 
         self.game_over_label.animate(opacity=1, duration=1.4)
-        graphics.chain(
-            self, {"opacity": 1, "duration": 0.7},
-            self.game_over_label, {"y": 20, "delay": 0.3, "duration": 1},
-            self.blink_prompt, {},
-        )
+
+        def appear():
+            yield self.animate(opacity=1, duration=0.7)
+            yield self.game_over_label.animate(y=20, delay=0.3, duration=1)
+            self.blink_prompt()
+
+        self.sequence(appear())
 
 
 
@@ -275,8 +277,7 @@ class StackedBar(graphics.Sprite):
 
                     return
 
-        # dummy for delay
-        self.animate(x=0, duration=0, delay=0.7, on_complete=kick)
+        self.after(0.7, kick)
 
 
 
@@ -320,52 +321,34 @@ class LevelScreen(layout.Container):
         extra = (claimed_percent - 75)
 
 
-        def fade_in_done(on_complete):
+        def steps():
+            yield self.animate(opacity=1, duration=.8)
+
             self.stats_bar.load(game.stats['claims'])
 
             self.level_score_label.score = game.stats['score']
             self.claimed_percent_label.score = claimed_percent
 
-
+            rows = []
             for i, (label, points) in enumerate(self.score_rows):
-                label.animate(delay=i*0.7, opacity=1)
-                points.animate(delay=i*0.7, opacity=1)
-
-            # dummy
-            self.animate(x=0, delay=0.7*2, on_complete=on_complete)
-
+                rows.append(label.animate(delay=i*0.7, opacity=1))
+                rows.append(points.animate(delay=i*0.7, opacity=1))
+            yield rows
 
-        def add_extra(on_complete):
-            #self.bonus_label.score = self.bonus_label.score + 1000
+            for i in range(extra):
+                yield self.bonus_label.animate(score=self.bonus_label.score + 1000, duration=0.1)
 
-            # dummy
-            self.bonus_label.animate(score=self.bonus_label.score + 1000, duration=0.1, on_complete=on_complete)
-
-
-        def scores_done(on_complete):
             for level in (0, game.level):
                 game.level_stats[level]['score'] += extra * 1000
-            self.box.animate(opacity=0, duration=0.5, delay=2.5, on_complete=on_complete)
+            yield self.box.animate(opacity=0, duration=0.5, delay=2.5)
 
-        def finish_level_screen():
             for level in (0, game.level):
                 game.level_stats[level]['score'] += extra * 1000
 
             self.visible = False
             callback()
 
-
-        chain = [
-            self, {"opacity": 1, "duration": .8},
-            fade_in_done, {},
-        ]
-
-        for i in range(extra):
-            chain += [add_extra, {}]
-
-        chain += [scores_done, {}, finish_level_screen, {}]
-
-        graphics.chain(*chain)
+        self.sequence(steps())
 
 
     def on_render_box(self, sprite):
@@ -0,0 +1,665 @@
+# - coding: utf-8 -
+# Copyright (C) 2013-2014 Toms Bauģis <toms.baugis at gmail.com>
+
+"""The rules of the board without any gtk attached - the cube, the sparks, the
+qix and the claims as plain objects that advance one tick per step().
+The sprites in board.py and sprites.py only mirror the state kept here, so the
+game can be simulated as fast as the CPU allows for tests, bots and balancing.
+"""
+
+import math
+import random
+import time
+
+from .lib import game_utils
+
+#: logic ticks per second of game time at normal speed
+TICKS_PER_SECOND = 45
+
+LEFT, RIGHT, UP, DOWN = "left", "right", "up", "down"
+
+
+class Timestep(object):
+    """fixed timestep accumulator. advance() adds up the time that has passed
+    on the monotonic clock since the previous call and tells how many ticks
+    of `step` seconds to run, keeping the remainder for the next time.
+    alpha is how far we are into the next tick, for interpolating the looks"""
+    __slots__ = ('step', 'max_steps', 'clock', 'accumulator', 'alpha', '_last')
+
+    def __init__(self, step=1.0 / TICKS_PER_SECOND, max_steps=5, clock=time.monotonic):
+        #: duration of a tick in seconds
+        self.step = step
+
+        #: most ticks to run at once. when we can't keep up, the game slows
+        #: down rather than spiraling into ever longer catch-ups
+        self.max_steps = max_steps
+
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        """forget the time that has passed, say after a pause"""
+        self.accumulator = 0
+        self.alpha = 0
+        self._last = None
+
+    def advance(self):
+        now = self.clock()
+        if self._last is not None:
+            self.accumulator += now - self._last
+        self._last = now
+
+        steps = int(self.accumulator / self.step)
+        if steps > self.max_steps:
+            steps = self.max_steps
+            self.accumulator = self.step * steps
+
+        self.accumulator -= self.step * steps
+        self.alpha = self.accumulator / self.step
+        return steps
+
+
+class Inputs(object):
+    """what the player is holding down during a tick"""
+    __slots__ = ('direction', 'claim', 'slow')
+
+    def __init__(self, direction=None, claim=False, slow=False):
+        #: one of LEFT, RIGHT, UP, DOWN or None when standing still
+        self.direction = direction
+
+        #: wants to start claiming new territory
+        self.claim = claim
+
+        #: goes slow for the extra points
+        self.slow = slow
+
+
+class Cube(object):
+    """the player"""
+    __slots__ = ('x', 'y', '_speeds', '_speed', 'drawing_speed', 'drawing',
+                 'current_line')
+
+    def __init__(self, x=0, y=0):
+        self.x, self.y = x, y
+        self._speeds = {
+            "fast": 4,
+            "slow": 2,
+        }
+        self.drawing_speed = self._speeds["fast"]
+        self._speed = "fast"
+        self.current_line = None
+        self.drawing = False
+
+    @property
+    def current_speed(self):
+        for speed_name, speed in self._speeds.items():
+            if speed == self.drawing_speed:
+                return speed_name
+        return "fast"
+
+    def set_drawing(self, drawing):
+        self.drawing = drawing
+        if drawing:
+            self.drawing_speed = self.speed
+
+    @property
+    def speed(self):
+        return self._speeds[self._speed]
+
+    @speed.setter
+    def speed(self, speed):
+        speed_number = self._speeds[speed]
+        # register the fastest speed we used to draw
+        self.drawing_speed = max(self.speed, speed_number)
+        self._speed = speed
+
+
+class Spark(object):
+    """walks the border of the game area and kills the cube on touch"""
+    __slots__ = ('x', 'y', 'speed', 'clockwise', 'frozen', 'confused',
+                 'current_line', '_polys_stack')
+
+    def __init__(self, x=0, y=0, speed=3, clockwise=True):
+        self.x, self.y = x, y
+        self.clockwise = clockwise
+        self.speed = speed
+
+        self._polys_stack = []
+        self.current_line = None
+
+        #: ticks to stand still for. 0 when on the move
+        self.frozen = 0
+
+        #: will turn around once thawed
+        self.confused = False
+
+    def next(self, dot, poly):
+        return game_utils.next_dot(dot, poly) if self.clockwise else game_utils.prev_dot(dot, poly)
+
+
+    def move(self, edges):
+        """walk along the polygon of the given game_utils.EdgeIndex. returns
+        True when the spark has lost track and got confused"""
+        if self.frozen:
+            self.frozen -= 1
+            if not self.frozen and self.confused:
+                self.confused = False
+                self.clockwise = not self.clockwise
+            return False
+
+        dot = (self.x, self.y)
+
+        # check if we are still on the new poly, because if we are not, then
+        # we will keep walking the old one until we get back on track
+        confused = False
+        if edges.on_line(dot):
+            self._polys_stack = [edges]
+        else:
+            if edges not in self._polys_stack:
+                self._polys_stack.append(edges)
+
+                if len(self._polys_stack) == 2:
+                    # stand still for a while and then turn around
+                    confused = self.confused = True
+                    self.frozen = 2 * TICKS_PER_SECOND
+
+            # we go from the freshest to oldest poly to see if we can find ourselves
+            for i, e in enumerate(reversed(self._polys_stack)):
+                if e.on_line(dot):
+                    edges = e
+                    break
+
+        poly = edges.poly
+        if not poly:
+            return confused
+
+        dot2 = None
+        if dot in poly:
+            dot2 = self.next(dot, poly)
+        else:
+            line = edges.on_line(dot)
+            if not line:
+                return confused
+            dot2 = line[1] if self.clockwise else line[0]
+
+
+        # distance is sum because one of them will be the same
+
+        speed = self.speed
+        while speed > 0:
+            distance = game_utils.distance(dot, dot2)
+            direction = 1 if any ((a<b for a, b in zip(dot, dot2))) else -1
+
+            step_speed = min(speed, distance)
+
+            if dot[0] == dot2[0]:
+                # vertical movement
+                self.y += step_speed * direction
+            else:
+                # horizontal movement
+                self.x += step_speed * direction
+
+            distance = distance - step_speed
+            if distance == 0:
+                dot, dot2 = dot2, self.next(dot2, poly)
+
+            speed = speed - step_speed
+
+        self.current_line = edges.on_line((self.x, self.y))
+        return confused
+
+
+class Qix(object):
+    """the qix has random movement that tries to stick within the set
+    degrees of angle, so that it appears to have an agenda"""
+    __slots__ = ('x', 'y', 'prev_x', 'prev_y', 'next_x', 'next_y',
+                 'next_distance', 'current_angle', 'claimed', 'started_moving',
+                 'steps', 'current_step')
+
+    # number of steps it takes to get from A to B
+    min_steps = 10
+    max_steps = 30
+
+    # the bigger the distance the bigger the hop
+    # the faster it will move
+    min_distance = 30
+    max_distance = 150
+
+    def __init__(self, x=0, y=0, angle=0):
+        self.x, self.y = x, y
+        self.started_moving = False
+        self.prev_x, self.prev_y = 0, 0
+        self.next_x, self.next_y = 0, 0
+        self.next_distance = 0
+        self.current_angle = angle
+        self.claimed = False
+
+        self.steps = 10
+        self.current_step = 0
+
+
+    def move(self, board):
+        if not self.started_moving:
+            self.started_moving = True
+            self.next_target(board)
+
+        self.current_step += 1
+
+        # push us closer to the target
+        factor = self.current_step * 1.0 / self.steps
+        self.x = self.prev_x * (1 - factor) + self.next_x * factor
+        self.y = self.prev_y * (1 - factor) + self.next_y * factor
+
+        if self.current_step == self.steps:
+            self.next_target(board)
+
+
+    def touching_poly(self, poly):
+        poly_lines = [(dot1, dot2) for dot1, dot2 in zip(poly, poly[1:])]
+        x1, y1, x2, y2 = int(self.x) - 10, int(self.y) - 10, \
+                         int(self.x) + 10, int(self.y) + 10
+        qix_box = game_utils._bounding_box((x1, y1), (x2, y2))
+
+        # first do a cheap run on the bounding box
+        if len(poly_lines) > 1:
+            (xb1, yb1), (xb2, yb2) = game_utils.box_range(poly)
+            if not any((xb1 <= x <= xb2 and yb1 <= y <= yb2 for (x, y) in qix_box)):
+                return False
+
+        box_lines = list(zip(qix_box, qix_box[1:]))
+        if game_utils.np:
+            return game_utils.first_intersection(box_lines, poly_lines) is not None
+
+        for line1 in box_lines:
+            for line2 in poly_lines:
+                if game_utils.intersection(line1, line2):
+                    return True
+        return False
+
+
+    def next_target(self, board):
+        self.prev_x, self.prev_y = self.x, self.y
+
+        rand = board.random
+        game_lines = board.game_area.edges
+
+        # each failed attempt widens the angle, so we can as well roll all
+        # the attempts upfront and check them in one go
+        candidates = []
+        for attempt in range(10):
+            angle_range = 180 + attempt * 60
+            delta_angle = self.current_angle - math.radians(angle_range / 2) + rand.random() * math.radians(angle_range)
+
+            distance = rand.randint(self.min_distance, self.max_distance)
+
+            x, y = self.x + distance * math.cos(delta_angle), self.y + distance * math.sin(delta_angle)
+            candidates.append((delta_angle, distance, int(x), int(y)))
+
+        # check for overlaps
+        paths = [((x, y), (self.x, self.y)) for delta_angle, distance, x, y in candidates]
+        if game_utils.np:
+            crossing = game_utils.segments_intersect(paths, game_lines).any(axis=1)
+        else:
+            crossing = (any((game_utils.intersection(path, line) for line in game_lines)) for path in paths)
+
+        target = None
+        for candidate, crosses in zip(candidates, crossing):
+            delta_angle, distance, x, y = candidate
+            if board.in_game_area((x, y)) and not crosses:
+                target = candidate
+                break
+
+        self.current_angle = delta_angle % math.radians(360)
+
+        self.steps = rand.randint(self.min_steps, self.max_steps)
+        self.current_step = 0
+
+        if target:
+            self.next_x, self.next_y = x, y
+            self.next_distance = distance
+
+
+class Board(object):
+    """the game board with the cube, the sparks and the qix.
+    step() advances it by one tick and returns the list of events that
+    happened in it, as tuples of the event name followed by its arguments:
+
+        ("spark-spawned", spark)
+        ("spark-confused", spark)
+        ("death", spark) - spark is None when the qix got the cube
+        ("claimed", inside, outside, claimed_area, speed)
+    """
+    __slots__ = ('seed', 'random', 'ticks', 'events', 'claiming', 'width', 'height',
+                 'game_area', 'game_area_edges', 'game_rects', 'game_rects_index',
+                 'raster', 'current_polygon', 'claimed_polys', 'cube',
+                 'sparks', 'sparks_waiting', 'spark_throttle_secs', 'qix',
+                 '_start_game_area', '_current_direction')
+
+    def __init__(self, start_area, sparks=2, qix=1, seed=None):
+        if seed is None:
+            seed = random.getrandbits(32)
+
+        #: seed of all the dice of the board. same seed and inputs play the
+        #: same game
+        self.seed = seed
+        self.random = random.Random(seed)
+
+        #: ticks since the board start
+        self.ticks = 0
+
+        #: events of the current tick
+        self.events = []
+
+        #: currently trying to claim new territory
+        self.claiming = False
+
+        # outer box - always relevant
+        self._start_game_area = start_area
+
+        #: the current available game area
+        self.game_area = game_utils.Polygon(start_area)
+
+        #: edge index of the game area for quick on-line checks
+        self.game_area_edges = game_utils.EdgeIndex(self.game_area)
+
+        (x, y), (x2, y2) = game_utils.box_range(self.game_area)
+        self.width, self.height = x2 - x, y2 - y
+
+        self.game_rects = game_utils.decompose(self.game_area)
+
+        #: claimed cells of the board for quick area checks. needs numpy
+        self.raster = game_utils.OccupancyRaster(start_area) if game_utils.np else None
+
+        #: the area checks without numpy go through the game rects index
+        self.game_rects_index = None if self.raster else game_utils.RectIndex(self.game_rects)
+
+        self.current_polygon = []
+        self._current_direction = None
+        self.claimed_polys = []
+
+        self.cube = Cube(x=x2 / 2, y=y2)
+
+        self.sparks_waiting = []
+        self.sparks = []
+        self.spark_throttle_secs = 1.5
+        for i in range(sparks):
+            self.sparks_waiting.append(Spark(x=x2 / 2, y=y, speed=2 + (i / 5.0), clockwise = i % 2 ==0))
+
+        self.qix = [Qix(x=x2 / 2, y=y2 / 2, angle=(i * 360.0 / qix)) for i in range(qix)]
+
+
+    def step(self, inputs):
+        """advance the board by one tick with the given Inputs and return the
+        events of the tick"""
+        self.tick()
+        self.check_death()
+        self.handle_inputs(inputs)
+        return self.events
+
+
+    def tick(self):
+        """move the sparks and the qix without the cube and return the events
+        of the tick"""
+        self.events = []
+
+        elapsed = self.ticks * 1.0 / TICKS_PER_SECOND
+        if self.sparks_waiting and elapsed > len(self.sparks) * self.spark_throttle_secs:
+            spark = self.sparks_waiting.pop()
+            spark.frozen = TICKS_PER_SECOND # fade in before going for the kill
+            self.sparks.append(spark)
+            self.events.append(("spark-spawned", spark))
+
+        for spark in self.sparks:
+            if spark.move(self.game_area_edges):
+                self.events.append(("spark-confused", spark))
+
+        for qix in self.qix:
+            # TODO - bounce against newly formed points
+            qix.move(self)
+
+        self.ticks += 1
+        return self.events
+
+
+    def in_game_bounds(self, dot):
+        return game_utils.in_area(dot, [self._start_game_area])
+
+
+    def in_game_area(self, dot, on_line=False):
+        """checks if the dot is in the remaining game area. looks it up in the
+        raster when we have one and in the game rects index otherwise"""
+        if self.raster:
+            return self.raster.in_area(dot, on_line)
+        return self.game_rects_index.in_area(dot, on_line)
+
+
+    def in_free_area(self, dot):
+        """checks if the dot is in the free area"""
+        if not self.in_game_bounds(dot):
+            # first we check if the dot is within out game area
+            return False
+
+        return self.in_game_area(dot, on_line=True)
+
+
+    def close_claim(self, poly, speed):
+        inside, outside = game_utils.cut_poly(self.game_area, poly)
+
+        # both areas come straight from the vertices and in the end we cut
+        # the claimed side out of the game rects
+        claimed_area = game_utils.poly_area(inside)
+        available_area = game_utils.poly_area(outside)
+
+        qixes = [qix for qix in self.qix if not qix.claimed]
+        # flip sides if the qix is not in the game area - can't claim
+        # qix space
+        claimed_qix = []
+        for qix in qixes:
+            if not game_utils.in_poly((qix.x, qix.y), outside, on_line=True):
+                claimed_qix.append(qix)
+
+        if (len(claimed_qix) > len(qixes) / 2.0) or (available_area < claimed_area and len(claimed_qix) >= len(qixes)):
+            # outside normally should be bigger than inside
+            # exception is when we have more qix on the smaller patch
+            inside, outside = outside, inside
+            claimed_area, available_area = available_area, claimed_area
+
+
+        for qix in qixes:
+            if not game_utils.in_poly((qix.x, qix.y), outside, on_line=True):
+                qix.claimed = True
+
+        claimed_rects = game_utils.decompose(inside)
+        self.game_rects = game_utils.cut_rects(self.game_rects, inside, claimed_rects)
+        if self.raster:
+            self.raster.claim(inside, claimed_rects)
+        else:
+            self.game_rects_index = game_utils.RectIndex(self.game_rects)
+        self.game_area = game_utils.Polygon(outside)
+        self.game_area_edges = game_utils.EdgeIndex(self.game_area)
+
+        self.claimed_polys.append((inside, 1))
+
+        for qix in self.qix:
+            # make sure they are not easing some place nasty
+            qix.next_target(self)
+
+        self.events.append(("claimed", inside, outside, claimed_area, speed))
+
+
+    def handle_inputs(self, inputs):
+        cube = self.cube
+        cube.speed = "slow" if inputs.slow else "fast"
+        x, y = cube.x, cube.y
+
+
+        # if we have direction, we know that user wants to do something
+        # when drawing hasn't been initiated, user can move around the game poly
+        # moving around game poly means the dot is on the line at any given time
+
+
+        # when drawing is started, user can move all over the place but can't bump
+        # into the current drawing polygon
+        # path is closed if the move ends up on the game poly
+        #
+
+        # both cases we will want to adjust the new_x or new direction so that
+        # it is somewhere on the line
+        game_poly_dot, non_game_poly_dot = None, None
+
+
+        current_pos = (cube.x, cube.y)
+        if current_pos in self.game_area:
+            current_line = [game_utils.prev_dot(current_pos, self.game_area),
+                            current_pos,
+                            game_utils.next_dot(current_pos, self.game_area)]
+        else:
+            current_line = self.game_area_edges.on_line(current_pos)
+
+        direction = inputs.direction
+        if not direction:
+            return
+        speed_direction = 1 if direction in (RIGHT, DOWN) else -1
+
+        # find the furthest step we can take for the next game polygon dot
+        # when not drawing that's as far as we can go on current line
+        # when drawing, that's the closest border within step
+        for speed in reversed(list(range(cube.speed))):
+            game_x = x if direction in (UP, DOWN) else x + (speed + 1) * speed_direction
+            game_y = y if direction in (LEFT, RIGHT) else y + (speed + 1) * speed_direction
+
+            if current_line:
+                if not game_poly_dot and game_utils.on_line((game_x, game_y), current_line):
+                    # if we are on a line then we are looking for the max position at
+                    # which we still have a hit
+                    game_poly_dot = (game_x, game_y)
+            else:
+                # roaming around - checking if the next move is valid
+                if self.game_area_edges.on_line((game_x, game_y)):
+                    game_poly_dot = (game_x, game_y)
+
+
+
+        # look for the furthest valid non-game poly
+        # we stop when we find non-poly point and then bump into an on-line point
+        for speed in range(cube.speed):
+            game_x = x if direction in (UP, DOWN) else x + (speed + 1) * speed_direction
+            game_y = y if direction in (LEFT, RIGHT) else y + (speed + 1) * speed_direction
+
+            on_line = self.game_area_edges.on_line((game_x, game_y))
+
+            if not self.in_game_bounds((game_x, game_y)):
+                break
+
+            if not on_line:
+                non_game_poly_dot = (game_x, game_y)
+            elif on_line and non_game_poly_dot:
+                break
+
+
+        if inputs.claim and non_game_poly_dot and not self.claiming:
+            if self.in_game_area(non_game_poly_dot, on_line=True):
+                self.claiming = True
+                cube.set_drawing(True)
+                self._current_direction = None
+
+
+        if self.claiming and self._current_direction != direction:
+            self._current_direction = direction
+            if (cube.x, cube.y) not in self.current_polygon:
+                self.current_polygon.append((cube.x, cube.y))
+
+
+        # when we are drawing, we can move outside the claimed poly's
+        # when we are moving around, we can move only within the poly
+        # check if the move is valid
+        # we will go through all lines and check that our path is not
+        # intersecting
+        if self.claiming and game_poly_dot:
+            self.close_claim(self.current_polygon + [game_poly_dot],
+                             cube.current_speed)
+            self.claiming = False
+            cube.set_drawing(False)
+            self.current_polygon = []
+            cube.x, cube.y = game_poly_dot
+            cube.current_line = self.game_area_edges.on_line(game_poly_dot)
+            return
+
+
+        on_current_poly = non_game_poly_dot and game_utils.on_line(non_game_poly_dot, self.current_polygon) is not None
+        if self.claiming and not on_current_poly and non_game_poly_dot:
+            if self.in_game_area(non_game_poly_dot, on_line=True):
+                cube.x, cube.y = non_game_poly_dot
+
+        if not self.claiming and game_poly_dot:
+            # legal move is one where the next dot is on the same line as the prev one
+            line = self.game_area_edges.on_line((cube.x, cube.y))
+            new_line, good_lines = None, []
+            if line:
+                prev1, prev2 = line
+                good_lines = [line for line in self.game_area.edges if prev1 in line or prev2 in line]
+                new_line = self.game_area_edges.on_line(game_poly_dot)
+
+
+            if new_line in good_lines:
+                cube.x, cube.y = game_poly_dot
+                cube.current_line = new_line
+
+
+    def check_death(self):
+        x, y = self.cube.x, self.cube.y
+        if not self.claiming:
+            # while not claiming beware of sparks
+            for spark in self.sparks:
+                if set(spark.current_line or []) & set(self.cube.current_line or []):
+                    if game_utils.distance((x, y), (spark.x, spark.y)) < 10:
+                        # on spark collision spark dies
+                        self.sparks.remove(spark)
+                        self.events.append(("death", spark))
+                        return True
+
+        else:
+            # while claiming beware of Qix
+            for qix in self.qix:
+                if game_utils.distance((x, y), (qix.x, qix.y)) < 20 or \
+                   qix.touching_poly(self.current_polygon + [(x, y)]):
+                    self.events.append(("death", None))
+                    return True
+        return False
+
+
+    def respawn(self):
+        """put the cube back where it started the failed claim"""
+        if self.current_polygon:
+            self.cube.x, self.cube.y = self.current_polygon[0]
+
+        self.current_polygon = []
+        self.claiming = False
+        self.cube.set_drawing(False)
+
+
+
+if __name__ == "__main__":
+    # a drunk bot that walks about and claims whenever it can. the board
+    # doesn't care about lives, so it just keeps going after deaths
+    board = Board([(0, 0), (600, 0), (600, 500), (0, 500), (0, 0)], sparks=3, qix=2, seed=1)
+    bot = random.Random(1)
+    directions = [LEFT, RIGHT, UP, DOWN]
+
+    ticks, deaths, claims = 10000, 0, 0
+    inputs = Inputs()
+    t = time.time()
+    for i in range(ticks):
+        if i % 20 == 0:
+            inputs = Inputs(bot.choice(directions), claim=bot.random() > 0.3,
+                            slow=bot.random() > 0.7)
+        for event in board.step(inputs):
+            if event[0] == "death":
+                deaths += 1
+                board.respawn()
+            elif event[0] == "claimed":
+                claims += 1
+    duration = time.time() - t
+    print("%d ticks in %.2fs (%d ticks/s), %d claims, %d deaths" % (ticks, duration,
+                                                                    ticks / duration,
+                                                                    claims, deaths))
@@ -165,22 +165,21 @@ class Scene(graphics.Scene):
         size = 100
         diagonal = math.sqrt(100**2 + 100**2)
 
-        graphics.chain(
+        def steps():
             # fly in
-            self.animate, {"sprite": a, "x": size, "duration": 1, "easing": Easing.Expo.ease_in_out},
+            yield self.animate(a, x=size, duration=1, easing=Easing.Expo.ease_in_out)
 
-            self.animate, {"sprite": Line(a, b), "rotation": math.radians(-45), "duration": 0.8},
+            yield self.animate(Line(a, b), rotation=math.radians(-45), duration=0.8)
 
-            #clone_grow, {"repeater": repeater},
-            #repeater, {"rotation": math.radians(-45), "duration": 1.3, "delay": 0.3},
+            #yield clone_grow(repeater)
+            #yield repeater.animate(rotation=math.radians(-45), duration=1.3, delay=0.3)
 
-            callback, {},
-        )
+            callback()
 
-        # parallel chains
-        graphics.chain(
-            self.animate, {"sprite": b, "x": size + diagonal, "duration": 1, "easing": Easing.Expo.ease_in_out},
-        )
+        self.sequence(steps())
+
+        # in parallel
+        self.animate(b, x=size + diagonal, duration=1, easing=Easing.Expo.ease_in_out)
 
 
 
@@ -195,26 +194,22 @@ class Scene(graphics.Scene):
         repeater2 = SymmetricalRepeater(4, poly)
 
 
-        def appear21(on_complete=None):
+        def appear21():
             parent.add_child(repeater2)
             a, b, c = repeater2.master_poly
 
             self.animate(Line(b, a), rotation=math.radians(-45), duration=0.7, easing=Easing.Expo.ease_in_out)
             self.animate(Line(b, c), rotation=math.radians(225), duration=0.7, easing=Easing.Expo.ease_in_out)
-            repeater2.animate(rotation=math.radians(-90), duration=0.7, easing=Easing.Expo.ease_in_out,
-                              on_complete=on_complete)
+            return repeater2.animate(rotation=math.radians(-90), duration=0.7, easing=Easing.Expo.ease_in_out)
 
-        def disappear21(on_complete):
+        def disappear21():
             a, b = repeater.master_poly
             c, d, e = repeater2.master_poly
-            graphics.chain(
-                self.animate, {"sprite": b, "x": 0, "duration": 0.6, "easing": Easing.Expo.ease_out},
-                on_complete, {}
-            )
 
             self.animate(d, x=d.x + 3000, duration=2.3, easing=Easing.Expo.ease_out)
             self.animate(c, x=c.x + 3000, duration=2.3, easing=Easing.Expo.ease_out)
             self.animate(e, x=e.x + 3000, duration=2.3, easing=Easing.Expo.ease_out)
+            return self.animate(b, x=0, duration=0.6, easing=Easing.Expo.ease_out)
 
 
 
@@ -223,24 +218,20 @@ class Scene(graphics.Scene):
         # push the dots away at the beginning
         a.x, b.x = 1000, 1000
 
-        def add_outline(on_complete=None):
-            self._add_outline(parent, on_complete)
-
-        graphics.chain(
+        def steps():
             # fly in
-            self.animate, {"sprite": a, "x": 0, "duration": 1.3},
-            appear21, {},
-            add_outline, {},
-            disappear21, {},
-            callback, {},
-        )
-
-    def _add_outline(self, parent, on_complete=None):
+            yield self.animate(a, x=0, duration=1.3)
+            yield appear21()
+            self._add_outline(parent)
+            yield disappear21()
+            callback()
+
+        self.sequence(steps())
+
+    def _add_outline(self, parent):
         cube2 = graphics.Polygon([(100, 0), (0, -100), (-100, 0), (0, 100), (100, 0)],
                                 stroke="#fafafa", line_width=3)
         parent.add_child(cube2)
-        if on_complete:
-            on_complete()
 
 
     def appear3(self, parent, callback):
@@ -250,14 +241,14 @@ class Scene(graphics.Scene):
         size = 100
         diagonal = math.sqrt(100**2 + 100**2)
 
-        def appear31(on_complete=None):
+        def appear31():
             poly = [(size, 0), (size, 0), (size, 0)]
             repeater2 = SymmetricalRepeater(4, poly)
             parent.add_child(repeater2)
             a, b, c = repeater2.master_poly
 
             self.animate(a, x=0, y=size, duration=1)
-            self.animate(c, x=0, y=-size, duration=1, on_complete=on_complete)
+            return self.animate(c, x=0, y=-size, duration=1)
 
 
         a, b = repeater.master_poly
@@ -265,17 +256,16 @@ class Scene(graphics.Scene):
         # push the dots away at the beginning
         a.x, b.x = 1000, 1000
 
-        graphics.chain(
+        def steps():
             # fly in
-            self.animate, {"sprite": a, "x": 0, "duration": 1.3},
-            appear31, {},
-            callback, {},
-        )
+            yield self.animate(a, x=0, duration=1.3)
+            yield appear31()
+            callback()
 
-        graphics.chain(
-            # fly in
-            self.animate, {"sprite": b, "x": size, "duration": 1.3},
-        )
+        self.sequence(steps())
+
+        # fly in
+        self.animate(b, x=size, duration=1.3)
 
 
     def on_first_frame(self, scene, context):
@@ -303,11 +293,11 @@ class Scene(graphics.Scene):
         def announce_ready():
             pass
 
-        graphics.chain(
-            cube, {"opacity": 1,
-                   "duration": 0.7, "delay": 0.3, "easing": Easing.Sine.ease_in_out},
-            announce_ready, {}
-        )
+        def steps():
+            yield cube.animate(opacity=1, duration=0.7, delay=0.3, easing=Easing.Sine.ease_in_out)
+            announce_ready()
+
+        self.sequence(steps())
 
         container.animate(y=150, duration=0.7, delay=0.3, easing= Easing.Sine.ease_out)
         title.animate(opacity=1, y=110, duration=0.7, delay=0.5, easing= Easing.Expo.ease_out)
@@ -0,0 +1,110 @@
+import unittest
+
+from apx.lib import game_utils
+
+
+def rect(x1, y1, x2, y2):
+    return [(x1, y1), (x2, y1), (x2, y2), (x1, y2), (x1, y1)]
+
+
+class PolygonTest(unittest.TestCase):
+    def test_whole_dots_go_in_an_int_array(self):
+        poly = game_utils.Polygon([(300.0, 0.0), (300.0, 100.0), (0.0, 100.0), (0.0, 0.0)])
+        self.assertEqual(poly.coords.typecode, "i")
+        self.assertEqual(poly.next((300, 0)), (300, 100))
+
+    def test_float_dots_stay_exact(self):
+        poly = game_utils.Polygon([(0, 0), (10.5, 0), (10.5, 5.25), (0, 5.25)])
+        self.assertEqual(list(poly), [(0, 0), (10.5, 0), (10.5, 5.25), (0, 5.25), (0, 0)])
+        self.assertEqual(poly.box, ((0, 0), (10.5, 5.25)))
+        self.assertEqual(poly.prev((10.5, 5.25)), (10.5, 0))
+
+    def test_list_dots(self):
+        poly = game_utils.Polygon(rect(0, 0, 10, 10))
+        self.assertIn([10, 0], poly)
+        self.assertNotIn([5, 0], poly)
+        self.assertEqual(poly.index([10, 10]), 2)
+
+
+class PolyAreaTest(unittest.TestCase):
+    def test_integer_dots(self):
+        self.assertEqual(game_utils.poly_area([(0, 0), (10, 0), (10, 5), (0, 5)]), 50)
+
+    def test_float_dots_give_an_integer(self):
+        area = game_utils.poly_area([(300.0, 0.0), (300.0, 100.0), (0.0, 100.0), (0.0, 0.0)])
+        self.assertEqual(area, 30000)
+        self.assertIsInstance(area, int)
+
+    def test_dots_off_the_grid(self):
+        self.assertEqual(game_utils.poly_area([(0, 0), (10.5, 0), (10.5, 4), (0, 4)]), 42)
+        self.assertAlmostEqual(game_utils.poly_area([(0, 0), (0.3, 0), (0.3, 0.3), (0, 0.3)]), 0.09)
+
+
+@unittest.skipIf(game_utils.np is None, "needs numpy")
+class OccupancyRasterTest(unittest.TestCase):
+    def test_claim_with_float_dots(self):
+        # the cube starts at 300.0, so the claimed paths come in floats
+        raster = game_utils.OccupancyRaster([(0.0, 0.0), (600.0, 0.0), (600.0, 500.0), (0.0, 500.0)])
+        raster.claim([(300.0, 0.0), (300.0, 100.0), (0.0, 100.0), (0.0, 0.0)])
+
+        self.assertEqual(raster.claimed_percent(), 10.0)
+        self.assertFalse(raster.in_area((150.0, 50.0)))
+        self.assertTrue(raster.in_area((450.0, 50.0)))
+        self.assertTrue(raster.in_area((300.0, 50.0), on_line=True))
+        self.assertFalse(raster.in_area((300.0, 50.0)))
+
+
+class CutRectsTest(unittest.TestCase):
+    def test_matches_full_decompose(self):
+        poly = game_utils.staircase(400, seed=1)
+        rects = game_utils.decompose(poly)
+        (min_x, min_y), (max_x, max_y) = game_utils.box_range(poly)
+        for x in range(min_x + 105, max_x, 200):
+            # cut from the bottom straight up to the top of the column
+            top = min((y1 for (x1, y1), (x2, y2) in zip(poly, poly[1:])
+                       if y1 == y2 and min(x1, x2) <= x <= max(x1, x2)))
+            inside, outside = game_utils.cut_poly(poly, [(x, max_y), (x, top)])
+            if game_utils.box_range(inside)[1][0] != x:
+                inside, outside = outside, inside
+
+            rects, poly = game_utils.cut_rects(rects, inside), outside
+            boxes = [game_utils.box_range(rect) for rect in rects]
+
+            # same area, no overlaps and nothing outside of the polygon means
+            # we cover exactly what the full decompose would
+            self.assertEqual(game_utils.total_area(rects),
+                             game_utils.total_area(game_utils.decompose(poly)))
+            for i, ((x1, y1), (x2, y2)) in enumerate(boxes):
+                self.assertTrue(game_utils.in_poly(((x1 + x2) / 2.0, (y1 + y2) / 2.0), poly))
+                for dot in game_utils._bounding_box((x1, y1), (x2, y2)):
+                    self.assertTrue(game_utils.in_poly(dot, poly, on_line=True))
+                for (x3, y3), (x4, y4) in boxes[:i]:
+                    self.assertTrue(x2 <= x3 or x4 <= x1 or y2 <= y3 or y4 <= y1)
+
+            # and in no more pieces than the full decompose
+            self.assertLessEqual(len(rects), len(game_utils.decompose(poly)))
+
+    def test_joins_pieces_along_shared_edges(self):
+        rects = [rect(0, 0, 50, 100), rect(50, 0, 100, 100)]
+        self.assertEqual(game_utils.cut_rects(rects, rect(0, 0, 100, 20)),
+                         [rect(0, 20, 100, 100)])
+
+    def test_leaves_the_rects_out_of_the_way_alone(self):
+        far, near = rect(200, 0, 300, 100), rect(100, 50, 200, 100)
+        rects = [far, near, rect(0, 0, 100, 100)]
+        res = game_utils.cut_rects(rects, rect(0, 0, 100, 20), [rect(0, 0, 100, 20)])
+        self.assertIs(res[0], far)
+        self.assertTrue(any(r is near for r in res))
+        self.assertIn(rect(0, 20, 100, 100), res)
+        self.assertEqual(len(res), 3)
+
+    def test_merge_boxes(self):
+        self.assertEqual(game_utils._merge_boxes([(0, 0, 10, 5), (0, 5, 10, 10), (10, 0, 20, 10)]),
+                         [(0, 0, 20, 10)])
+        # an edge shared only in part stays
+        self.assertEqual(game_utils._merge_boxes([(0, 0, 10, 5), (0, 5, 20, 10)]),
+                         [(0, 0, 10, 5), (0, 5, 20, 10)])
+
+
+if __name__ == "__main__":
+    unittest.main()
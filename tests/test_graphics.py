@@ -0,0 +1,36 @@
+import unittest
+
+from apx.lib import pytweener
+
+try:
+    from apx.lib import graphics
+except ImportError:
+    graphics = None
+
+
+@unittest.skipIf(graphics is None, "needs gtk and cairo")
+class ColorUtilsTest(unittest.TestCase):
+    def tweened(self):
+        """a color on its way from red to white, as the color tweens hand out"""
+        return pytweener.Tweenable("#f00", "#fff").update(0.5)
+
+    def test_rgb_of_a_tweened_color(self):
+        self.assertEqual(graphics.Colors.rgb(self.tweened()), [255, 127.5, 127.5])
+
+    def test_tweened_color_is_light(self):
+        self.assertTrue(graphics.Colors.is_light(self.tweened()))
+        self.assertFalse(graphics.Colors.is_light("#333"))
+
+    def test_darker_tweened_color(self):
+        for channel, expected in zip(graphics.Colors.darker(self.tweened(), 0), (255, 127.5, 127.5)):
+            self.assertAlmostEqual(channel, expected)
+        r, g, b = graphics.Colors.darker(self.tweened(), 50)
+        self.assertLess(r + g + b, 255 + 127.5 * 2)
+
+    def test_contrast_and_gdk_on_tweened_color(self):
+        self.assertEqual(len(graphics.Colors.contrast(self.tweened(), 50)), 3)
+        self.assertIsNotNone(graphics.Colors.gdk(self.tweened()))
+
+
+if __name__ == "__main__":
+    unittest.main()
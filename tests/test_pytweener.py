@@ -0,0 +1,97 @@
+import unittest
+
+from apx.lib import pytweener
+
+
+class Dot(object):
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+
+class ConflictTest(unittest.TestCase):
+    tweeners = (pytweener.Tweener, pytweener.VectorTweener)
+
+    def test_new_tween_takes_over_the_running_keys(self):
+        for tweener_class in self.tweeners:
+            dot, tweener = Dot(x=0, y=0), tweener_class()
+            tweener.add_tween(dot, x=100, y=100, duration=1, easing=pytweener.Easing.Linear.ease_in)
+            tweener.update(0.5)
+
+            tweener.add_tween(dot, x=0, duration=1, easing=pytweener.Easing.Linear.ease_in)
+            tweener.update(0.25)
+            self.assertAlmostEqual(dot.x, 37.5, msg=tweener_class.__name__)
+            self.assertAlmostEqual(dot.y, 75, msg=tweener_class.__name__)
+
+    def test_last_call_wins_over_a_waiting_tween(self):
+        for tweener_class in self.tweeners:
+            dot, tweener = Dot(x=0), tweener_class()
+            tweener.add_tween(dot, x=100, duration=1, delay=2, easing=pytweener.Easing.Linear.ease_in)
+            tweener.add_tween(dot, x=50, duration=0.5, easing=pytweener.Easing.Linear.ease_in)
+            for i in range(40):
+                tweener.update(0.1)
+            self.assertAlmostEqual(dot.x, 50, msg=tweener_class.__name__)
+            self.assertFalse(tweener.has_tweens(), msg=tweener_class.__name__)
+
+    def test_waiting_tween_keeps_the_keys_it_is_not_beaten_on(self):
+        for tweener_class in self.tweeners:
+            dot, tweener = Dot(x=0, y=0), tweener_class()
+            tweener.add_tween(dot, x=100, y=100, duration=1, delay=0.5, easing=pytweener.Easing.Linear.ease_in)
+            tweener.add_tween(dot, x=40, duration=1, easing=pytweener.Easing.Linear.ease_in)
+            tweener.update(1)
+            self.assertAlmostEqual(dot.x, 40, msg=tweener_class.__name__)
+            self.assertAlmostEqual(dot.y, 50, msg=tweener_class.__name__)
+
+            tweener.update(1)
+            self.assertAlmostEqual(dot.x, 40, msg=tweener_class.__name__)
+            self.assertAlmostEqual(dot.y, 100, msg=tweener_class.__name__)
+
+    def test_delayed_tween_takes_the_keys_when_it_starts(self):
+        for tweener_class in self.tweeners:
+            dot, tweener = Dot(x=0, y=0), tweener_class()
+            tweener.add_tween(dot, x=100, y=100, duration=1, easing=pytweener.Easing.Linear.ease_in)
+            tweener.add_tween(dot, x=40, y=40, duration=1, delay=0.75, easing=pytweener.Easing.Linear.ease_in)
+            tweener.update(0.5)
+            self.assertAlmostEqual(dot.x, 50, msg=tweener_class.__name__)
+
+            # 0.25s in, going on from 50 where the first one got. the first
+            # one has nothing left and is gone
+            tweener.update(0.5)
+            self.assertAlmostEqual(dot.x, 50 - 10 * 0.25, msg=tweener_class.__name__)
+            self.assertAlmostEqual(dot.y, 50 - 10 * 0.25, msg=tweener_class.__name__)
+            self.assertEqual(len(tweener.get_tweens(dot)), 1, msg=tweener_class.__name__)
+
+    def test_delayed_tween_with_a_partial_overlap(self):
+        for tweener_class in self.tweeners:
+            dot, tweener = Dot(x=0, y=0), tweener_class()
+            tweener.add_tween(dot, x=100, y=100, duration=1, easing=pytweener.Easing.Linear.ease_in)
+            tweener.add_tween(dot, x=0, duration=1, delay=0.5, easing=pytweener.Easing.Linear.ease_in)
+            tweener.update(0.4)
+            self.assertAlmostEqual(dot.x, 40, msg=tweener_class.__name__)
+
+            # the delayed tween goes from 40 and has x to itself
+            tweener.update(0.35)
+            self.assertAlmostEqual(dot.x, 40 - 40 * 0.25, msg=tweener_class.__name__)
+            self.assertAlmostEqual(dot.y, 75, msg=tweener_class.__name__)
+
+            tweener.update(0.5)
+            self.assertAlmostEqual(dot.x, 40 - 40 * 0.75, msg=tweener_class.__name__)
+            self.assertAlmostEqual(dot.y, 100, msg=tweener_class.__name__)
+
+
+class LookupTest(unittest.TestCase):
+    def test_tables_are_reused(self):
+        ease = pytweener.Easing.Sine.ease_out
+        table = pytweener.lookup(ease)
+        self.assertIs(pytweener.lookup(ease), table)
+        self.assertIs(pytweener.lookup(table), table)
+        self.assertIs(table.exact, ease)
+        self.assertLessEqual(table.error, pytweener.LOOKUP_TOLERANCE)
+
+    def test_cache_is_bounded(self):
+        for i in range(pytweener.LOOKUP_CACHE + 1):
+            pytweener.lookup(lambda t, i=i: t, samples=4)
+        self.assertLessEqual(pytweener._lookup.cache_info().currsize, pytweener.LOOKUP_CACHE)
+
+
+if __name__ == "__main__":
+    unittest.main()